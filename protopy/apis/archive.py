@@ -0,0 +1,9 @@
+# archive.py
+import protopy.settings as sts
+from colorama import Fore, Style
+from protopy.creator.archive import main as archive
+
+
+def main(*args, api:str=None, **kwargs) -> None:
+    print(f"api.archive: {api = }, {kwargs = }")
+    return archive(*args, **kwargs)
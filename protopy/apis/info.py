@@ -7,6 +7,7 @@ NOTE: do not remove or change the lines marked with # clone_remove_line (process
 
 import subprocess
 import fnmatch, os, sys
+from typing import Iterator
 import pyperclip, requests
 from tabulate import tabulate as tb
 from colorama import Fore, Style
@@ -25,11 +26,29 @@ all_infos = {"python", "package"}
 
 
 def collect_infos(msg: str, init=False, info_list: list = []) -> list:
+    # generators (i.e. the project tree) are kept as they are and consumed on output
     if init: info_list.clear()
-    if msg: info_list.append(str(msg))
+    if msg: info_list.append(msg if isinstance(msg, Iterator) else str(msg))
     return info_list
 
 
+def iter_infos(*args, **kwargs) -> Iterator[str]:
+    """
+    Yields the collected infos as text chunks, "".join() gives the full info text.
+    """
+    for i, msg in enumerate(collect_infos('')):
+        if i:
+            yield "\n"
+        if isinstance(msg, str):
+            yield msg
+        else:
+            yield from msg
+
+
+def info_error(info: str, e: Exception, *args, **kwargs) -> str:
+    return f"{Fore.RED}ERROR:{Fore.RESET} in {info}_info {e = }. Skipping..."
+
+
 def get_infos(*args, verbose, infos: set = set(), **kwargs):
     collect_infos('', True)
     if infos:
@@ -37,9 +56,7 @@ def get_infos(*args, verbose, infos: set = set(), **kwargs):
             try:
                 getattr(sys.modules[__name__], f"{info}_info")(*args, verbose=verbose, **kwargs)
             except Exception as e:
-                print(
-                    f"{Fore.RED}ERROR:{Fore.RESET} in {info}_info {e = }. Skipping..."
-                )
+                print(info_error(info, e))
     collect_infos(
         f"{Fore.YELLOW}\nfor more infos: {Style.RESET_ALL}proto info "
         f"{Fore.YELLOW}-i{Style.RESET_ALL} {all_infos} "
@@ -80,14 +97,7 @@ def package_info(*args, verbose: int = 0, **kwargs):
             f"$EXE: {sys.executable} -> {pipenv_is_active(sys.executable) = }\n"
         )
     )
-    tree = (Tree(*args, verbose=verbose, **kwargs)(sts.project_dir,
-                                                                colorized=True,
-                                                                ignores=sts.ignore_dirs,
-                                                                verbose=verbose)
-    )
-    collect_infos(f"{tree.get('tree')}\n")
-    if verbose:
-        collect_infos(f"{tree.get('contents')}\n")
+    collect_infos(iter_tree_infos(*args, verbose=verbose, **kwargs))
     try:
         collect_infos(
             subprocess.run(
@@ -107,6 +117,19 @@ def package_info(*args, verbose: int = 0, **kwargs):
         # package help
 
 
+def iter_tree_infos(*args, verbose: int = 0, **kwargs) -> Iterator[str]:
+    """
+    Project tree and (with verbose) file contents from one walk, rendered while they
+    are consumed. Consumed after get_infos, so walk errors are reported here.
+    """
+    try:
+        tree = Tree(*args, verbose=verbose, **kwargs)
+        yield from tree.iter_text(project_dir=sts.project_dir, cache=True,
+                        ignores=sts.ignore_dirs, contents=bool(verbose), colorized=True)
+    except Exception as e:
+        print(info_error("package", e))
+
+
 # project environment info
 def pipenv_is_active(exec_path, *args, **kwargs):
     """
@@ -118,15 +141,26 @@ def pipenv_is_active(exec_path, *args, **kwargs):
         exec_path.split('Scripts')[0].strip(os.sep)).startswith(sts.project_name)
     return is_active
 
-def main(*args, clip=None, verbose:int=0, **kwargs) -> str:
+def iter_main(*args, verbose:int=0, **kwargs) -> Iterator[str]:
+    """
+    Streaming main (i.e. chunked server responses), yields the info text in chunks.
+    """
     get_infos(*args, verbose=verbose, **kwargs)
-    out = "\n".join(collect_infos(f""))
+    yield from iter_infos()
+
+def main(*args, clip=None, verbose:int=0, **kwargs) -> None:
+    # printed while the infos are rendered, only clip needs the whole text
+    parts = [] if clip else None
+    for chunk in iter_main(*args, verbose=verbose, **kwargs):
+        print(chunk, end='')
+        if parts is not None:
+            parts.append(chunk)
+    print()
     if clip:
-        pyperclip.copy(out)
+        pyperclip.copy("".join(parts))
         print(f"{Fore.GREEN}Copied to clipboard!{Style.RESET_ALL}")
     if verbose >= 2:
         printing.pretty_dict('main.kwargs', kwargs)
-    return out
 
 if __name__ == "__main__":
     main(verbose=2, infos=all_infos, clip=False)
\ No newline at end of file
@@ -0,0 +1,12 @@
+# schedule.py
+import protopy.settings as sts
+from colorama import Fore, Style
+from protopy.creator.scheduler import main as schedule
+
+# runs until stopped, server.pyw does not serve it (it would block the single threaded server)
+long_running = True
+
+
+def main(*args, api:str=None, **kwargs) -> None:
+    print(f"api.schedule: {api = }, {kwargs = }")
+    return schedule(*args, **kwargs)
@@ -31,6 +31,8 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
     """
     # Class attribute to hold the discovered API modules
     available_apis = {}
+    # chunks smaller than this are merged before they are sent
+    chunk_bytes = 1 << 16
 
     @classmethod
     def load_apis(cls, *args, **kwargs):
@@ -51,7 +53,9 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
             try:
                 module_path = f"protopy.apis.{api_name}"
                 module = importlib.import_module(module_path)
-                if hasattr(module, "main"):
+                if getattr(module, "long_running", False):
+                    logging.info(f"Skipping long running API: '{api_name}'")
+                elif hasattr(module, "main"):
                     cls.available_apis[api_name] = module
                     logging.info(f"Successfully loaded API: '{api_name}'")
                 else:
@@ -67,7 +71,10 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
         parsed_url = urlparse(self.path)
         api_name = parsed_url.path.strip("/")
         target_api_module = self.available_apis.get(api_name)
-        if target_api_module:
+        if target_api_module and hasattr(target_api_module, "iter_main"):
+            self._stream_api(*args, api_module=target_api_module, parsed_url=parsed_url,
+                                                                    api_name=api_name, **kwargs)
+        elif target_api_module:
             try:
                 api_response = self.run_api_command(
                     *args,
@@ -75,7 +82,9 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
                     parsed_url=parsed_url,
                     **kwargs
                 )
-                self._send_ok_response(api_response, *args, **kwargs)
+                self._send_ok_response(api_response, *args,
+                    content_type=getattr(target_api_module, "content_type", "text/plain"),
+                    **kwargs)
             except Exception as e:
                 self.send_error(500, f"Error executing API '{api_name}': {e}")
                 logging.error(f"Failed to run API command for '{api_name}': {e}")
@@ -93,12 +102,50 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
             return_value = api_module.main(*args, **prepared_kwargs)
         return return_value if isinstance(return_value, str) else ""
 
-    def _send_ok_response(self, content: str, *args, **kwargs):
-        """Sends a 200 OK response with the provided content."""
+    def _send_ok_response(self, content: str, *args, content_type: str = "text/plain",
+                                                                                **kwargs):
+        """Sends a 200 OK response with the provided content (API modules may set content_type)."""
+        body = content.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        # one connection at a time (TCPServer), keep-alive would block other clients
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_api(self, *args, api_module, parsed_url, api_name: str, **kwargs):
+        """
+        Streams the chunks of api_module.iter_main as a chunked 200 response, the
+        output is sent while it is rendered and never held in memory as a whole.
+        """
+        query_params = parse_qs(parsed_url.query)
+        prepared_kwargs = self._prepare_kwargs(*args, query_params=query_params, **kwargs)
+        chunks = api_module.iter_main(*args, **prepared_kwargs)
         self.send_response(200)
         self.send_header("Content-type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
         self.end_headers()
-        self.wfile.write(content.encode("utf-8"))
+        buf = bytearray()
+        try:
+            # The API's printed output will be ignored, only the yielded chunks are sent.
+            with contextlib.redirect_stdout(io.StringIO()):
+                for chunk in chunks:
+                    buf += chunk.encode("utf-8")
+                    if len(buf) >= self.chunk_bytes:
+                        self._write_chunk(buf)
+                        buf.clear()
+        except Exception as e:
+            # headers are out already, the error becomes the end of the body
+            buf += f"\nError executing API '{api_name}': {e}\n".encode("utf-8")
+            logging.error(f"Failed to stream API command for '{api_name}': {e}")
+        if buf:
+            self._write_chunk(buf)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes, *args, **kwargs):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + bytes(data) + b"\r\n")
 
     def run_api_command(self, *args, api_module, parsed_url, **kwargs) -> str:
         """
@@ -142,6 +189,10 @@ class ProtoControlHandler(http.server.SimpleHTTPRequestHandler):
             
         return prepared_kwargs
 
+# HTTP/1.1 for chunked responses of streaming APIs (modules with iter_main), the name is
+# built so that clones (alias replacement of the template text) keep the attribute
+setattr(ProtoControlHandler, "prot" + "ocol_version", "HTTP/1.1")
+
 def run_server(*args, verbose:int=1, **kwargs):
     """Sets up and runs the HTTP server indefinitely."""
     ProtoControlHandler.load_apis(*args, **kwargs)
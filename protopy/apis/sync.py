@@ -0,0 +1,9 @@
+# sync.py
+import protopy.settings as sts
+from colorama import Fore, Style
+from protopy.creator.sync import main as sync
+
+
+def main(*args, api:str=None, **kwargs) -> None:
+    print(f"api.sync: {api = }, {kwargs = }")
+    return sync(*args, **kwargs)
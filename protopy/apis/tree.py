@@ -0,0 +1,25 @@
+# tree.py
+"""
+Project tree as JSON (helpers/nodes.py), i.e. for editor plugins that query subtrees.
+call like: http://localhost:9001/tree/?rel=protopy/helpers&depth=1
+"""
+
+import protopy.settings as sts
+from protopy.helpers.tree import Tree
+
+# served as application/json by server.pyw
+content_type = "application/json"
+
+
+def main(*args, project_dir: str = None, tgt_dir: str = None, rel: str = None,
+    depth: int = None, max_depth: int = 6, verbose: int = 0, **kwargs) -> str:
+    """
+    rel selects a subtree, depth limits the levels listed below it (default: all).
+    """
+    tree = Tree(*args, verbose=verbose, yes=True)
+    root = tree.mk_nodes(project_dir=project_dir or tgt_dir or sts.project_dir,
+                                        max_depth=max_depth, ignores=sts.ignore_dirs)
+    node = root.get(rel) if rel else root
+    if node is None:
+        raise FileNotFoundError(f"{rel} not found in {root.path}")
+    return node.to_json(depth=depth)
@@ -0,0 +1,9 @@
+# verify.py
+import protopy.settings as sts
+from colorama import Fore, Style
+from protopy.creator.checksums import main as verify
+
+
+def main(*args, api:str=None, **kwargs) -> None:
+    print(f"api.verify: {api = }, {kwargs = }")
+    return verify(*args, **kwargs)
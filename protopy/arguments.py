@@ -107,6 +107,201 @@ def mk_args():
         help=f"This will trigger pipenv to install the environment using py_version.",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        required=False,
+        nargs=None,
+        const=None,
+        type=int,
+        default=None,
+        help="number of parallel file workers for clone/archive, 0: one per cpu, default: 1",
+    )
+
+    parser.add_argument(
+        "--pool",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        choices=["thread", "process"],
+        help="worker pool used with --jobs, process suits CPU heavy transforms, default: thread",
+    )
+
+    parser.add_argument(
+        "--copy_mode",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        choices=["auto", "hardlink", "reflink", "kernel", "copy2"],
+        help="archive: file copy backend, hardlink only for read-only snapshots, default: auto",
+    )
+
+    parser.add_argument(
+        "--profile",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="clone: print per phase timings and write a JSON profile next to the project",
+    )
+
+    parser.add_argument(
+        "--dry_run",
+        required=False,
+        nargs="?",
+        const=True,
+        type=str,
+        default=None,
+        help="clone, sync: only print the operation plan, optionally write it as JSON to the given path",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        help="clone: yml file listing many projects to clone, use with -j for concurrency",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="archive: hardlink files unchanged since the previous snapshot instead of copying",
+    )
+
+    parser.add_argument(
+        "--format",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        choices=["dir", "tar.gz", "tar.xz", "zip"],
+        help="archive: dir mirrors the tree, the others stream into one compressed file",
+    )
+
+    parser.add_argument(
+        "--level",
+        required=False,
+        nargs=None,
+        const=None,
+        type=int,
+        default=None,
+        help="archive: compression level for --format, 0-9, default: 6",
+    )
+
+    parser.add_argument(
+        "--checksums",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="archive: write a checksum manifest while copying, check it with: proto verify, "
+             "copied files then go through a hashing user space copy (--copy_mode is ignored)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="archive: continue the last interrupted snapshot, skipping files already done",
+    )
+
+    parser.add_argument(
+        "--bwlimit",
+        required=False,
+        nargs=None,
+        const=None,
+        type=int,
+        default=None,
+        help="archive, schedule: max bytes per second copied, default: unlimited",
+    )
+
+    parser.add_argument(
+        "--interval",
+        required=False,
+        nargs=None,
+        const=None,
+        type=float,
+        default=None,
+        help="schedule: minutes between snapshots, default: params.yml schedule",
+    )
+
+    parser.add_argument(
+        "--once",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="schedule: take one snapshot and prune, then exit",
+    )
+
+    parser.add_argument(
+        "--sources",
+        required=False,
+        nargs="+",
+        const=None,
+        type=str,
+        default=None,
+        help="archive: source paths to archive, default: params.yml defaultSources",
+    )
+
+    parser.add_argument(
+        "--target",
+        required=False,
+        nargs="+",
+        const=None,
+        type=str,
+        default=None,
+        help="archive: archive target(s), default: params.yml defaultTargets, verify: snapshot dirs or archive files",
+    )
+
+    parser.add_argument(
+        "--rename",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        help="archive: rename the archived start directory",
+    )
+
+    parser.add_argument(
+        "--comment",
+        required=False,
+        nargs=None,
+        const=None,
+        type=str,
+        default=None,
+        help="archive: comment added to the archive directory name [10-72 chars]",
+    )
+
+    parser.add_argument(
+        "--direct",
+        required=False,
+        nargs="?",
+        const=1,
+        type=bool,
+        default=False,
+        help="archive: copy into target directly instead of a timestamped archive dir",
+    )
+
     parser.add_argument(
         "-i",
         "--infos",
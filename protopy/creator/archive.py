@@ -1,61 +1,233 @@
 # archive.py
 # from . import arguments
-import os, re, sys, yaml
+import hashlib, json, os, re, sys, yaml
 from tabulate import tabulate
 from datetime import datetime as dt 
 import colorama as color
 color.init()
 import shutil
 import protopy.settings as sts
+from protopy.helpers.workers import iter_jobs
+from protopy.helpers.filters import filters
+from protopy.helpers.walker import walk
+from protopy.helpers.copying import copy_file as copy_with
+from protopy.helpers.throttle import TokenBucket
+from protopy.creator.compress import formats, write_archive
+from protopy.creator.checksums import (copy_hashed, hash_file, load_manifest, manifest_entry,
+                                        manifest_name, write_manifest)
 
-def collect_ignored_dirs(source, ignore_dirs, *args, **kwargs):
+# append-only list of completed files inside a snapshot (see --resume)
+journal_name = '.archive_journal'
+# snapshot dir names start with their timestamp (see mk_tgt_dir)
+snapshot_rx = re.compile(r'\d{4}-\d\d-\d\d')
+
+def iter_files(source, ignore_dirs=None, *args, jobs=None, **kwargs):
+    """
+    Single scandir traversal of source (helpers/walker.py), ignored directories are
+    pruned before they are entered. Yields (src_path, path relative to source), files
+    of one directory are yielded together.
+    Like os.walk, symlinked directories are not followed.
     """
-    Uses os.walk and regular expressions to collect directories to be ignored.
+    # compiled once per pattern set (helpers/filters.py), searched on the '/' path
+    ignored = filters(archive_dirs=ignore_dirs).matcher('archive')
+    def prune(name, path, depth):
+        # the source itself is never ignored, only directories below it
+        return depth > 0 and ignored(path)
+    for d in walk(source, prune=prune, jobs=jobs):
+        for entry in d.files:
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            yield os.path.normpath(entry.path), os.path.normpath(os.path.join(d.rel, entry.name))
 
-    Args:
-        source (str): The root directory to start searching from.
-        ignore_dirs (list of str): Regular expressions for directory paths to ignore.
+def walk_source(source, target, ignore_dirs=None, *args, jobs=None, **kwargs):
+    """
+    iter_files mapped onto target. Target directories are created on the way, so the
+    yielded (src_path, dest_path) pairs can be copied right away.
+    """
+    made = None
+    for src_path, rel_path in iter_files(source, ignore_dirs, jobs=jobs):
+        dest_path = os.path.join(target, rel_path)
+        if (dest_dir := os.path.dirname(dest_path)) != made:
+            os.makedirs(dest_dir, exist_ok=True)
+            made = dest_dir
+        yield src_path, dest_path
 
-    Returns:
-        set: A set of directories to be ignored.
+def _file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.digest()
+
+def unchanged(src_path, prev_path, *args, **kwargs) -> bool:
     """
-    ignored = set()
-    regexs = [re.compile(d) for d in ignore_dirs]
+    True if prev_path (same file in the previous snapshot) has the content of src_path.
+    size + mtime decide, equal sizes with different mtimes fall back to a hash.
+    """
+    try:
+        st, prev = os.stat(src_path), os.stat(prev_path)
+    except OSError:
+        return False
+    if st.st_size != prev.st_size:
+        return False
+    if st.st_mtime_ns == prev.st_mtime_ns:
+        return True
+    return _file_hash(src_path) == _file_hash(prev_path)
 
-    for root, dirs, _ in os.walk(source, topdown=True):
-        for dir in dirs:
-            dir_path = os.path.join(root, dir).replace(os.sep, '/')
-            if any(regex.search(dir_path) for regex in regexs):
-                ignored.add(os.path.normpath(dir_path))
-    return ignored
+def copy_file(item, *args, copy_mode:str='auto', checksums:bool=False, throttle=None, **kwargs):
+    """
+    Copies a single (src_path, dest_path[, prev_path, prev_entry]) item, used by the
+    archive workers. With prev_path (incremental mode) unchanged files are hardlinked
+    to the previous snapshot instead of copied, like rsync --link-dest.
+    With checksums the copied bytes are hashed on the way (see checksums.py), linked
+    files reuse the hash of the previous manifest entry. throttle caps the copy rate.
+    Returns (copy backend used (see helpers/copying.py) or 'linked', manifest entry or None).
+    """
+    src_path, dest_path, prev_path, prev_entry = (*item, None, None)[:4]
+    if prev_path is not None and unchanged(src_path, prev_path):
+        # hardlink falls back to a copy of the snapshot file across devices
+        mode = 'linked' if copy_with(prev_path, dest_path, mode='hardlink',
+                                                throttle=throttle) == 'hardlink' \
+                                                                                else 'copy2'
+        if not checksums:
+            return mode, None
+        st = os.stat(dest_path)
+        if prev_entry and prev_entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return mode, prev_entry
+        return mode, manifest_entry(dest_path, hash_file(dest_path))
+    if checksums:
+        # user space copy, the hash comes from the bytes copied anyway
+        return 'hashed', manifest_entry(dest_path, copy_hashed(src_path, dest_path,
+                                                                        throttle=throttle))
+    return copy_with(src_path, dest_path, mode=copy_mode, throttle=throttle), None
 
-def custom_ignore(ignored):
+def archive_to_file(srctgtPaths, ignore_dirs=None, *args, fmt:str='tar.gz', level:int=None,
+                        jobs:int=None, out_path:str=None, checksums:bool=False, **kwargs):
+    """
+    Streams all sources into one compressed archive file instead of a directory tree.
+    Members are named like the directory mode targets: <target name>/<relative path>.
+    out_path defaults to the snapshot directory name + extension.
+    With checksums <out_path>.manifest.json lists the hashes of all members.
     """
-    Custom ignore function for shutil.copytree.
+    out_path = out_path or os.path.normpath(os.path.dirname(srctgtPaths[0][-1])) + formats[fmt]
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    print(f'{color.Fore.YELLOW}Now Archiving to: {color.Style.RESET_ALL}{out_path} ...')
 
-    Args:
-        ignored (set): Set of directory paths to ignore.
+    def members():
+        for source, target in srctgtPaths:
+            name = os.path.basename(target)
+            if os.path.isdir(source):
+                for src_path, rel_path in iter_files(source, ignore_dirs, jobs=jobs):
+                    yield src_path, os.path.join(name, rel_path)
+            elif os.path.isfile(source):
+                yield source, name
 
-    Returns:
-        callable: A function that shutil.copytree can use to determine what to ignore.
+    count, errors, hashes = write_archive(members(), out_path, fmt, level=level, jobs=jobs,
+                                                                        checksums=checksums)
+    if checksums:
+        write_manifest(f"{out_path}.manifest.json", hashes)
+    if not errors:
+        print(f"{color.Fore.GREEN}{count} Files archived into {out_path} "
+              f"({os.path.getsize(out_path)} bytes): {dt.now()}{color.Style.RESET_ALL}")
+    else:
+        print(f"{color.Fore.RED}{errors}\n{dt.now()}{color.Style.RESET_ALL}")
+    return srctgtPaths
+
+def load_journal(snapshot, *args, **kwargs):
+    """
+    Reads the journal of a snapshot.
+    Returns ({relative path: {'size', 'mtime_ns', 'hash'}}, finished), finished runs end
+    with a terminal {'complete', 'errors'} record, also when files failed.
     """
-    def _ignore_func(dir, cs):
-        return set(c for c in cs if os.path.join(dir, c) in ignored)
-    return _ignore_func
+    done, complete = {}, False
+    try:
+        with open(os.path.join(snapshot, journal_name), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break # torn last line of an interrupted run
+                if 'complete' in rec:
+                    complete = True
+                else:
+                    done[rec['rel']] = rec
+    except FileNotFoundError:
+        pass
+    return done, complete
 
-def archive(srctgtPaths, ignore_dirs=None, *args, **kwargs):
+def find_resumable(archive_dir, *args, **kwargs):
+    """
+    The latest snapshot in archive_dir whose journal has no terminal record (an interrupted
+    run), None if there is none.
+    """
+    if not os.path.isdir(archive_dir):
+        return None
+    snapshots = sorted((d.name for d in os.scandir(archive_dir)
+                       if d.is_dir() and snapshot_rx.match(d.name)), reverse=True)
+    for name in snapshots:
+        snapshot = os.path.join(archive_dir, name)
+        if os.path.isfile(os.path.join(snapshot, journal_name)):
+            return None if load_journal(snapshot)[1] else snapshot
+    return None
+
+def is_done(src_path, dest_path, rec, *args, **kwargs) -> bool:
+    # journaled, source unchanged since and target still complete
+    try:
+        st = os.stat(src_path)
+        return rec['size'] == st.st_size == os.path.getsize(dest_path) \
+                                                    and rec['mtime_ns'] == st.st_mtime_ns
+    except OSError:
+        return False
+
+def archive(srctgtPaths, ignore_dirs=None, *args, jobs:int=None, pool:str='thread',
+                copy_mode:str='auto', link_dest:str=None, checksums:bool=False,
+                        resume:bool=False, throttle=None, direct:bool=False, **kwargs):
     """
     Archives files and directories, excluding directories that match patterns in ignore_dirs.
 
     Args:
         srctgtPaths (list of tuples): List containing source and target paths.
         ignore_dirs (list of str): Regular expressions for directory paths to ignore.
+        jobs (int): Number of copy workers, None or 1 copies sequentially.
+        copy_mode (str): auto, hardlink, reflink, kernel or copy2 (see helpers/copying.py).
+        link_dest (str): Previous snapshot dir, unchanged files are hardlinked from there.
+        checksums (bool): Write a checksum manifest into the snapshot (see checksums.py).
+        resume (bool): Skip files the snapshot journal lists as done and unchanged.
+        throttle (TokenBucket): Caps copied bytes per second (see helpers/throttle.py).
+        direct (bool): Sources are copied straight into the target, no snapshot journal.
 
     Returns:
         List of tuples: The source and target paths used for archiving.
     """
     # run archiving
-    errors, dir_count = [], 0
+    errors, dir_count, used, hashes = [], 0, {}, {}
+    snapshot = os.path.dirname(srctgtPaths[0][-1]) if srctgtPaths else None
+    prev_files = {}
+    if checksums and link_dest is not None \
+                        and os.path.isfile(os.path.join(link_dest, manifest_name)):
+        prev_files = load_manifest(os.path.join(link_dest, manifest_name))['files']
+    # append-only journal of completed files, an interrupted run can be resumed from it
+    # only timestamped snapshots are journaled, direct targets can not be resumed
+    journaled = bool(snapshot) and not direct and bool(snapshot_rx.match(os.path.basename(snapshot)))
+    done, skipped, journal = (load_journal(snapshot)[0] if resume and journaled else {}), 0, None
+    if journaled:
+        os.makedirs(snapshot, exist_ok=True)
+        journal = open(os.path.join(snapshot, journal_name), 'a', encoding='utf-8', buffering=1)
+
+    def pending(copies):
+        nonlocal skipped
+        for src_path, dest_path in copies:
+            rel = os.path.relpath(dest_path, snapshot).replace(os.sep, '/')
+            if rel in done and is_done(src_path, dest_path, done[rel]):
+                skipped += 1
+                if checksums and done[rel].get('hash'):
+                    rec = done[rel]
+                    hashes[rel] = [rec['size'], rec['mtime_ns'], rec['hash']]
+                continue
+            yield src_path, dest_path
     archiveds = tabulate(srctgtPaths,
                     headers=['source', 'target'], tablefmt='psql', showindex=True).split('\n')
     print((
@@ -68,29 +240,56 @@ def archive(srctgtPaths, ignore_dirs=None, *args, **kwargs):
     )
     for i, (source, target) in enumerate(srctgtPaths):
         try:
-            ignored = collect_ignored_dirs(source, ignore_dirs)
+            file_errors = []
             if os.path.isdir(source):
                 os.makedirs(target, exist_ok=True)
-                for root, dirs, files in os.walk(source, topdown=True):
-                    dirs[:] = [d for d in dirs if not os.path.normpath(os.path.join(root, d)) in ignored]
-                    for file in files:
-                        src_path = os.path.normpath(os.path.join(root, file))
-                        if not src_path in ignored:
-                            relative_path = os.path.relpath(src_path, source)
-                            dest_path = os.path.join(target, relative_path)
-                            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                            shutil.copy2(src_path, dest_path)
-                            dir_count += 1
+                # the walk feeds the copy workers while it is still running
+                copies = pending(walk_source(source, target, ignore_dirs, jobs=jobs))
+                if link_dest is not None:
+                    copies = ((s, d, os.path.join(link_dest, os.path.relpath(d, snapshot)),
+                               prev_files.get(os.path.relpath(d, snapshot).replace(os.sep, '/')))
+                                                                            for s, d in copies)
+                for (src_path, dest_path, *_), r, e in iter_jobs(copy_file, copies, jobs=jobs,
+                                    pool=pool, copy_mode=copy_mode, checksums=checksums,
+                                                                        throttle=throttle):
+                    if e is None:
+                        dir_count += 1
+                        used[r[0]] = used.get(r[0], 0) + 1
+                        rel = os.path.relpath(dest_path, snapshot).replace(os.sep, '/')
+                        if r[1] is not None:
+                            hashes[rel] = r[1]
+                        if journal is not None:
+                            st = os.stat(src_path)
+                            journal.write(json.dumps({'rel': rel, 'size': st.st_size,
+                                'mtime_ns': st.st_mtime_ns, 'hash': r[1] and r[1][2]}) + '\n')
+                    else:
+                        file_errors.append((src_path, e))
             elif os.path.isfile(source):
-                shutil.copyfile(source, target)
-            print(f"{color.Fore.WHITE}{archiveds[i+3]}{color.Style.RESET_ALL}")
+                if checksums:
+                    hashes[os.path.relpath(target, snapshot)] = manifest_entry(
+                                                        target, copy_hashed(source, target))
+                else:
+                    shutil.copyfile(source, target)
+            if file_errors:
+                print(f"{color.Fore.RED}{archiveds[i+3]} -> {len(file_errors)} errors{color.Style.RESET_ALL}")
+                errors.extend((src_path, target, e) for src_path, e in file_errors)
+            else:
+                print(f"{color.Fore.WHITE}{archiveds[i+3]}{color.Style.RESET_ALL}")
         except Exception as e:
             print(f"{color.Fore.RED}{archiveds[i+3]} -> {e}{color.Style.RESET_ALL}")
             errors.append((source, target, e))
+    if checksums and snapshot:
+        print(f"checksum manifest: {write_manifest(os.path.join(snapshot, manifest_name), hashes)}")
+    if journal is not None:
+        # terminal record also after file errors, only interrupted runs are resumed
+        journal.write(json.dumps({'complete': dt.now().isoformat(timespec='seconds'),
+                                                            'errors': len(errors)}) + '\n')
+        journal.close()
     if not errors:
         print(f"{archiveds[-1]}",)
         print(f"{color.Fore.GREEN}{dir_count} Directories archived:", end=' ')
         print(f"{dt.now()}{color.Style.RESET_ALL}")
+        print(f"copy backends used: {used}" + (f", resumed: {skipped} files skipped" if resume else ''))
     else:
         print(f"{color.Fore.RED}{errors}\n{dt.now()}{color.Style.RESET_ALL}")
     return srctgtPaths
@@ -107,6 +306,18 @@ def mk_tgt_dir(*args, comment=None, direct:bool=False, **kwargs) -> str:
     tgtDirName += f"_{re.sub(r'([:./ ])', r'_' , comment)}"
     return tgtDirName.strip('_')
 
+def find_link_dest(tgtDir, *args, **kwargs):
+    """
+    The latest previous snapshot next to tgtDir, None if there is none.
+    Snapshot names start with their timestamp (see mk_tgt_dir), so they sort by age.
+    """
+    archive_dir, name = os.path.split(os.path.normpath(tgtDir))
+    if not os.path.isdir(archive_dir):
+        return None
+    snapshots = sorted(d.name for d in os.scandir(archive_dir)
+                       if d.is_dir() and d.name != name and snapshot_rx.match(d.name))
+    return os.path.join(archive_dir, snapshots[-1]) if snapshots else None
+
 def prep_target( *args, defaultTargets, target=None, **kwargs):
     # define archive targets
     targets = target if target is not None else defaultTargets
@@ -114,6 +325,13 @@ def prep_target( *args, defaultTargets, target=None, **kwargs):
         if os.path.exists(os.path.join(target, 'archive')):
             break
     assert target, f"None of the required archive Targets was found: {targets}"
+    if kwargs.get('resume') and not kwargs.get('direct'):
+        # continue the interrupted snapshot instead of starting a new one
+        tgtDir = find_resumable(os.path.join(target, 'archive'))
+        if tgtDir is not None:
+            print(f"{color.Fore.YELLOW}Resuming snapshot:{color.Style.RESET_ALL} {tgtDir}")
+            return tgtDir
+        print(f"{color.Fore.YELLOW}Nothing to resume, starting a new snapshot{color.Style.RESET_ALL}")
     tgtDir = os.path.join(target, 'archive', mk_tgt_dir(**kwargs))
     return tgtDir
 
@@ -127,6 +345,8 @@ def prep_paths(     tgtDir, *args,
     sources = sources if sources is not None else defaultSources
     paths = []
     for source in sources:
+        # params.yml may reference settings like sts.project_dir
+        if source.startswith('sts.'): source = getattr(sts, source[4:], source)
         sourcePath = os.path.expanduser(source)
         print(f"{color.Fore.YELLOW}sourcePath: {sourcePath}{color.Style.RESET_ALL}")
         if not os.path.exists(sourcePath):
@@ -150,4 +370,29 @@ def main(*args, **kwargs):
     # kwargs = arguments.mk_args().__dict__
     params = get_parameter(**kwargs)
     tgtDir = prep_target(**kwargs, **params)
-    srctgtPaths = archive(prep_paths(tgtDir, **params, **kwargs), params['ignore_dirs'])
+    fmt = kwargs.get('format') or 'dir'
+    if fmt != 'dir':
+        srctgtPaths = prep_paths(tgtDir, **params, **kwargs)
+        # direct archives are named after the (first) source instead of the snapshot
+        out_path = srctgtPaths[0][-1] + formats[fmt] if kwargs.get('direct') and srctgtPaths else None
+        return archive_to_file(srctgtPaths, params['ignore_dirs'], fmt=fmt, level=kwargs.get('level'),
+                        jobs=kwargs.get('jobs'), out_path=out_path, checksums=kwargs.get('checksums'))
+    # incremental snapshots link unchanged files to the previous one, not for direct copies
+    link_dest = None
+    if kwargs.get('incremental') and not kwargs.get('direct'):
+        link_dest = find_link_dest(tgtDir)
+        print(f"{color.Fore.YELLOW}Incremental, previous snapshot:{color.Style.RESET_ALL} {link_dest}")
+    if kwargs.get('checksums') and kwargs.get('copy_mode') not in (None, 'auto'):
+        # hashes come from the copied bytes, so copies run through copy_hashed
+        print(f"{color.Fore.YELLOW}--checksums copies in user space, "
+              f"--copy_mode {kwargs['copy_mode']} is ignored{color.Style.RESET_ALL}")
+    if kwargs.get('bwlimit') and (kwargs.get('pool') or 'thread') != 'thread':
+        # one token bucket is shared by all copy threads, processes can not share it
+        kwargs['pool'] = 'thread'
+    srctgtPaths = archive(prep_paths(tgtDir, **params, **kwargs), params['ignore_dirs'],
+                            jobs=kwargs.get('jobs'), pool=kwargs.get('pool') or 'thread',
+                            copy_mode=kwargs.get('copy_mode') or 'auto', link_dest=link_dest,
+                            checksums=kwargs.get('checksums'), resume=kwargs.get('resume'),
+                            direct=kwargs.get('direct'),
+                            throttle=TokenBucket(kwargs['bwlimit']) if kwargs.get('bwlimit') else None)
+    return srctgtPaths
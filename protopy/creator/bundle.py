@@ -0,0 +1,264 @@
+# bundle.py
+"""
+Precompiled template bundles stored in sts.resources_dir/bundles.
+A bundle snapshots the cleaned template once: file list, text blobs, text/binary
+flags and the offsets of every replaceable token and '# clone_remove_line' line.
+Clones then only splice the new names in at the stored offsets, no file of the
+template has to be read or searched again.
+
+Bundles are keyed by a fingerprint of (path, size, mtime) of every template file
+plus the token set, so any template change invalidates the bundle automatically.
+"""
+
+import hashlib, json, os, shutil, tempfile, time
+from datetime import datetime as dt
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import protopy.settings as sts
+from protopy.helpers.content import ContentIndex
+from protopy.helpers.copying import copy_file
+from protopy.helpers.replacer import Replacer
+
+# bump when the bundle layout changes
+bundle_version = 1
+# bundles used within this many seconds are not pruned, another clone may still read them
+prune_grace_s = 3600
+
+
+def fingerprint(src_dir: str, targets: Dict[str, str], *args, tokens: List[str], marker: str,
+                                                                    **kwargs) -> Tuple[str, dict]:
+    """
+    Cheap template hash from file stats, the template files are not read.
+
+    Returns:
+        tuple: (hex key, {template rel path: os.stat_result})
+    """
+    stats = {rel: os.stat(src_path) for rel, src_path in targets.items()}
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([bundle_version, os.path.abspath(src_dir), sorted(tokens), marker]
+                                                                            ).encode('utf-8'))
+    for rel in sorted(stats):
+        st = stats[rel]
+        h.update(f"{rel}\0{targets[rel]}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest(), stats
+
+
+def digest(data: bytes, *args, **kwargs) -> str:
+    """
+    Content hash of a cloned file, recorded in the clone manifest (see creator/sync.py).
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_digest(path: str, *args, **kwargs) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def marker_lines(text: str, marker: str, *args, **kwargs) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of every line containing marker, line ending included.
+    """
+    lines, pos = [], 0
+    while True:
+        i = text.find(marker, pos)
+        if i < 0:
+            return lines
+        start = text.rfind('\n', 0, i) + 1
+        end = text.find('\n', i)
+        end = len(text) if end < 0 else end + 1
+        lines.append((start, end))
+        pos = end
+
+
+class TemplateBundle:
+
+    def __init__(self, bundle_dir: str, *args, **kwargs):
+        self.bundle_dir = bundle_dir
+        with open(os.path.join(bundle_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.files = self.manifest['files']
+        self._blobs = None
+
+    @property
+    def blobs(self) -> bytes:
+        # one sequential read for all text files of the template
+        if self._blobs is None:
+            with open(os.path.join(self.bundle_dir, 'blobs.bin'), 'rb') as f:
+                self._blobs = f.read()
+        return self._blobs
+
+    def data(self, entry: dict, *args, **kwargs) -> bytes:
+        return self.blobs[entry['offset']:entry['offset'] + entry['size']]
+
+    def src_path(self, entry: dict, *args, **kwargs) -> str:
+        return os.path.join(self.manifest['template_dir'], entry['src'])
+
+    def render(self, entry: dict, table: Dict[str, str], *args, **kwargs
+                                                                ) -> Tuple[bytes, List[str]]:
+        """
+        Applies the stored token spans and marker lines to a text entry.
+        Returns the new content and the removed lines.
+        """
+        raw = self.data(entry)
+        if not entry['spans'] and not entry['removed']:
+            return raw, []
+        text = raw.decode('utf-8', errors='ignore')
+        cuts = [(s, e, None) for s, e in entry['removed']] + [tuple(c) for c in entry['spans']]
+        # removed lines sort before tokens starting at the same offset
+        cuts.sort(key=lambda c: (c[0], c[2] is not None))
+        parts, removed_lines, pos = [], [], 0
+        for s, e, old in cuts:
+            if s < pos:
+                continue # token inside a removed line
+            parts.append(text[pos:s])
+            if old is None:
+                removed_lines.append(text[s:e])
+            else:
+                parts.append(table.get(old, old))
+            pos = e
+        parts.append(text[pos:])
+        new = ''.join(parts)
+        return (new.encode('utf-8') if new != text else raw), removed_lines
+
+    def target_digest(self, entry: dict, table: Dict[str, str], *args, **kwargs) -> str:
+        """
+        Content hash materialize would produce, nothing is written.
+        """
+        if entry['binary']:
+            return file_digest(self.src_path(entry))
+        return digest(self.render(entry, table)[0])
+
+    def materialize(self, entry: dict, tgt_path: str, table: Dict[str, str], *args,
+                                                                            **kwargs) -> dict:
+        """
+        Writes one entry to tgt_path and restores the template file mode and mtime.
+        The returned digest is the content hash of the written file.
+        """
+        if entry['binary']:
+            # reflink or kernel side copy where available, copy2 otherwise
+            copy_file(self.src_path(entry), tgt_path)
+            return {'read': entry['size'], 'written': entry['size'], 'changed': False,
+                    'removed_lines': [], 'digest': file_digest(tgt_path)}
+        out, removed_lines = self.render(entry, table)
+        with open(tgt_path, 'wb') as f:
+            f.write(out)
+        os.chmod(tgt_path, entry['mode'])
+        os.utime(tgt_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        return {'read': entry['size'], 'written': len(out), 'changed': out != self.data(entry),
+                'removed_lines': removed_lines, 'digest': digest(out)}
+
+
+@lru_cache(maxsize=8)
+def open_bundle(bundle_dir: str) -> TemplateBundle:
+    """
+    Shared per process, so thread and process workers load a bundle only once.
+    """
+    return TemplateBundle(bundle_dir)
+
+
+def build_bundle(src_dir: str, targets: Dict[str, str], bundle_dir: str, *args, stats: dict,
+                                        tokens: List[str], marker: str, **kwargs) -> str:
+    """
+    Reads every template file once and writes manifest.json + blobs.bin.
+    Every build writes its own tmp dir, concurrent clones can build the same bundle.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(bundle_dir)}.", suffix='.tmp',
+                                                            dir=os.path.dirname(bundle_dir))
+    try:
+        _write_bundle(src_dir, targets, tmp_dir, stats=stats, tokens=tokens, marker=marker)
+        os.replace(tmp_dir, bundle_dir)
+    except BaseException as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        # a parallel build of the same template finished first, its bundle is identical
+        if isinstance(e, OSError) and os.path.isfile(os.path.join(bundle_dir, 'manifest.json')):
+            return bundle_dir
+        raise
+    return bundle_dir
+
+
+def _write_bundle(src_dir: str, targets: Dict[str, str], tmp_dir: str, *args, stats: dict,
+                                        tokens: List[str], marker: str, **kwargs) -> None:
+    index = ContentIndex(src_dir)
+    finder = Replacer({t: t for t in tokens}, case_variants=False)
+    files, offset = [], 0
+    with open(os.path.join(tmp_dir, 'blobs.bin'), 'wb') as blobs:
+        for rel, src_path in sorted(targets.items()):
+            st = stats[rel]
+            entry = {'rel': rel, 'src': os.path.relpath(src_path, src_dir), 'offset': -1,
+                     'size': st.st_size, 'mode': st.st_mode & 0o7777,
+                     'mtime_ns': st.st_mtime_ns, 'spans': [], 'removed': [],
+                     'binary': index.is_binary(src_path, st=st)}
+            if not entry['binary']:
+                with open(src_path, 'rb') as f:
+                    raw = f.read()
+                text = raw.decode('utf-8', errors='ignore')
+                entry.update(offset=offset, size=len(raw), spans=finder.spans(text),
+                                                        removed=marker_lines(text, marker))
+                blobs.write(raw)
+                offset += len(raw)
+            files.append(entry)
+    index.prune()
+    index.save()
+    manifest = {'version': bundle_version, 'template_dir': os.path.abspath(src_dir),
+                'created': dt.now().isoformat(timespec='seconds'), 'tokens': tokens,
+                'marker': marker, 'files': files}
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def bundles_dir(*args, **kwargs) -> str:
+    # resolved per call, sts.resources_dir can be redirected (i.e. by tests)
+    return os.path.join(sts.resources_dir, 'bundles')
+
+
+def prune_bundles(prefix: str, keep: str, *args, **kwargs) -> None:
+    """
+    Removes outdated bundles of the same template, unless they were used within
+    prune_grace_s (load_bundle touches the manifest of a reused bundle).
+    """
+    root = bundles_dir()
+    for name in os.listdir(root):
+        if not name.startswith(prefix) or name == keep:
+            continue
+        try:
+            used = os.path.getmtime(os.path.join(root, name, 'manifest.json'))
+        except OSError:
+            used = 0 # left over from an interrupted build
+        if time.time() - used > prune_grace_s:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_bundle(src_dir: str, targets: Dict[str, str], *args, tokens: List[str], marker: str,
+                                                            **kwargs) -> TemplateBundle:
+    """
+    Returns the bundle matching the current template, building it if needed.
+
+    Args:
+        targets (dict): {template relative target path: source path}
+        tokens (list): All strings whose offsets are recorded (case variants included).
+        marker (str): Lines containing marker are removed during materialization.
+    """
+    key, stats = fingerprint(src_dir, targets, tokens=tokens, marker=marker)
+    src_dir = os.path.abspath(src_dir)
+    # one bundle per template location, outdated ones are pruned by this prefix
+    loc = hashlib.md5(src_dir.encode('utf-8')).hexdigest()[:8]
+    prefix = f"{os.path.basename(src_dir)}-{loc}-"
+    name = f"{prefix}{key}"
+    bundle_dir = os.path.join(bundles_dir(), name)
+    manifest = os.path.join(bundle_dir, 'manifest.json')
+    if os.path.isfile(manifest):
+        # marks the bundle as in use for prune_bundles of other clones
+        try:
+            os.utime(manifest)
+        except OSError:
+            pass
+    else:
+        os.makedirs(bundles_dir(), exist_ok=True)
+        build_bundle(src_dir, targets, bundle_dir, stats=stats, tokens=tokens, marker=marker)
+        prune_bundles(prefix, name)
+    return open_bundle(bundle_dir)
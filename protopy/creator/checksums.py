@@ -0,0 +1,198 @@
+# checksums.py
+"""
+Checksum manifests for archives (proto archive --checksums) and proto verify.
+
+While archiving, files are hashed on the bytes that are copied anyway, so nothing
+is read twice. The manifest lists relative path, size, mtime and hash of every
+archived file:
+    directory snapshots:  <snapshot>/.archive_manifest.json
+    archive files:        <archive file>.manifest.json (paths are member names)
+verify re-hashes a snapshot on a thread pool. Large files are hashed from mmap
+slices, hashlib releases the GIL on big buffers, so threads scale with the disk.
+"""
+
+import hashlib, json, mmap, os, shutil, tarfile, zipfile
+from datetime import datetime as dt
+from typing import Dict, List, Tuple
+
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from protopy.helpers.walker import walk
+from protopy.helpers.workers import run_jobs
+
+hash_algo = 'blake2b'
+manifest_name = '.archive_manifest.json'
+# archive bookkeeping files in a snapshot root (manifest, journal) are not archived files
+meta_prefix = '.archive_'
+chunk_size = 1 << 20
+# files above this size are hashed from mmap slices instead of read() calls
+mmap_min = 8 << 20
+
+
+def new_hash(algo: str = hash_algo, *args, **kwargs):
+    return hashlib.new(algo)
+
+
+def hash_file(path: str, *args, algo: str = hash_algo, **kwargs) -> str:
+    h = new_hash(algo)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= mmap_min:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                view = memoryview(m)
+                for i in range(0, size, mmap_min):
+                    h.update(view[i:i + mmap_min])
+                view.release()
+        else:
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def copy_hashed(src: str, dst: str, *args, algo: str = hash_algo, throttle=None,
+                                                                            **kwargs) -> str:
+    """
+    Copies src to dst in user space and hashes the bytes on the way.
+    throttle (helpers/throttle.py TokenBucket) caps the rate. Returns the hex digest.
+    """
+    h = new_hash(algo)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    with open(src, 'rb') as fs, open(dst, 'wb') as fd:
+        while chunk := fs.read(chunk_size):
+            if throttle is not None:
+                throttle.consume(len(chunk))
+            h.update(chunk)
+            fd.write(chunk)
+    shutil.copystat(src, dst)
+    return h.hexdigest()
+
+
+class HashingReader:
+    """
+    File wrapper hashing everything read through it (tar members).
+    """
+
+    def __init__(self, f, *args, algo: str = hash_algo, **kwargs):
+        self.f, self.h = f, new_hash(algo)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.h.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.h.hexdigest()
+
+
+def manifest_entry(src_path: str, digest: str, *args, **kwargs) -> list:
+    st = os.stat(src_path)
+    return [st.st_size, st.st_mtime_ns, digest]
+
+
+def write_manifest(path: str, files: Dict[str, list], *args, algo: str = hash_algo,
+                                                                        **kwargs) -> str:
+    """
+    files: {relative path ('/' separated): [size, mtime_ns, hexdigest]}
+    """
+    manifest = {'algorithm': algo, 'created': dt.now().isoformat(timespec='seconds'),
+                'files': {rel.replace(os.sep, '/'): v for rel, v in sorted(files.items())}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return path
+
+
+def load_manifest(path: str, *args, **kwargs) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _check(item: Tuple[str, str, list], *args, algo: str, **kwargs) -> str | None:
+    # returns the problem or None if the file is intact
+    path, rel, (size, _, digest) = item
+    try:
+        if os.path.getsize(path) != size:
+            return 'size'
+        return None if hash_file(path, algo=algo) == digest else 'hash'
+    except FileNotFoundError:
+        return 'missing'
+
+
+def verify_dir(snapshot: str, *args, jobs: int = None, **kwargs) -> Dict[str, List[str]]:
+    """
+    Re-hashes a directory snapshot against its manifest.
+    Returns {'missing': [...], 'corrupt': [...], 'extra': [...], 'ok': [...]}.
+    """
+    manifest = load_manifest(os.path.join(snapshot, manifest_name))
+    files = manifest['files']
+    items = [(os.path.join(snapshot, rel.replace('/', os.sep)), rel, v) for rel, v in files.items()]
+    # hashing is I/O bound and releases the GIL, default to more threads than cpus
+    jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+    out = {'missing': [], 'corrupt': [], 'extra': [], 'ok': []}
+    for (_, rel, _), problem, e in run_jobs(_check, items, jobs=jobs, algo=manifest['algorithm']):
+        if e is not None or problem not in (None, 'missing'):
+            out['corrupt'].append(rel)
+        else:
+            out['missing' if problem else 'ok'].append(rel)
+    for d in walk(snapshot):
+        for entry in d.files:
+            rel = os.path.join(d.rel, entry.name).replace(os.sep, '/')
+            if not rel.startswith(meta_prefix) and rel not in files:
+                out['extra'].append(rel)
+    return out
+
+
+def verify_file(archive_path: str, *args, **kwargs) -> Dict[str, List[str]]:
+    """
+    Re-hashes the members of a tar/zip archive against <archive_path>.manifest.json.
+    Members are read sequentially, compressed streams can not be split.
+    """
+    manifest = load_manifest(f"{archive_path}.manifest.json")
+    files, algo = manifest['files'], manifest['algorithm']
+    out = {'missing': [], 'corrupt': [], 'extra': [], 'ok': []}
+    seen = set()
+    def check(name, f):
+        h = new_hash(algo)
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+        seen.add(name)
+        if name not in files:
+            out['extra'].append(name)
+        else:
+            out['ok' if h.hexdigest() == files[name][2] else 'corrupt'].append(name)
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                with zf.open(info) as f:
+                    check(info.filename, f)
+    else:
+        # not 'r|*': tarfile's stream reader stops after the first gzip member
+        with tarfile.open(archive_path, 'r:*') as tf:
+            for m in tf:
+                if m.isfile():
+                    check(m.name, tf.extractfile(m))
+    out['missing'] = sorted(files.keys() - seen)
+    return out
+
+
+def verify(path: str, *args, jobs: int = None, verbose: int = 0, **kwargs) -> Dict[str, List[str]]:
+    """
+    Verifies a directory snapshot or an archive file and prints the report.
+    """
+    out = verify_dir(path, jobs=jobs) if os.path.isdir(path) else verify_file(path)
+    bad = {k: v for k, v in out.items() if k != 'ok' and v}
+    rows = [(k, rel) for k, v in bad.items() for rel in sorted(v)]
+    if rows:
+        print(tabulate(rows, headers=['problem', 'path'], tablefmt='psql'))
+    color = Fore.RED if bad else Fore.GREEN
+    print(f"{color}{path}: {len(out['ok'])} ok, {len(out['missing'])} missing, "
+          f"{len(out['corrupt'])} corrupt, {len(out['extra'])} extra{Style.RESET_ALL}")
+    return out
+
+
+def main(*args, tgt_dir: str = None, target: list = None, jobs: int = None, **kwargs) -> str:
+    paths = target or [tgt_dir or os.getcwd()]
+    results = [verify(os.path.expanduser(p), jobs=jobs) for p in paths]
+    intact = all(not (r['missing'] or r['corrupt'] or r['extra']) for r in results)
+    return "Archive intact" if intact else "Archive damaged"
@@ -3,12 +3,23 @@ import protopy.settings as sts
 from protopy.helpers.printing import logprint, Color, MODULE_COLORS
 MODULE_COLORS["clone"] = Color.MAGENTA
 from colorama import Fore, Style
+from tabulate import tabulate
 import subprocess
-import os, re, shutil, stat, sys, time
+import json, os, re, shutil, stat, sys, time, yaml
+from functools import partial
 from typing import List, Dict, Tuple
 
-# needed for cloning - aliased to avoid confusion with this script's own main()
-from protopy.creator.archive import main as archive_main
+# template ignore rules are shared with the archiver
+from protopy.creator.archive import get_parameter
+from protopy.creator.profiler import Profiler
+from protopy.creator.interpreters import get_installed_py_versions
+from protopy.creator.bundle import TemplateBundle, file_digest, load_bundle, open_bundle
+from protopy.creator.plan import Operation, Plan
+from protopy.helpers.replacer import Replacer, compile_replacer
+from protopy.helpers.content import is_binary
+from protopy.helpers.filters import filters
+from protopy.helpers.walker import walk
+from protopy.helpers.workers import run_jobs
 
 DEFAULT_PORT = 9001
 project_params = {
@@ -20,57 +31,14 @@ project_params = {
 
 
 path_patterns = {
-    'file_patterns': [r'.*\.log$', r'.*\.lock$', r'.*\.tmp$', r'^temp.*', r'^clone\.py$'],
+    'file_patterns': [r'.*\.log$', r'.*\.lock$', r'.*\.tmp$', r'^temp.*', r'^clone\.py$',
+                      r'^archive\.py$', r'^sync\.py$', r'^verify\.py$',
+                      r'^schedule\.py$',
+                      # tests of the creator package, /creator is not cloned (params.yml)
+                      r'^test_(archive|clone|interpreters|profiler|sync)\.py$'],
 }
-
-# --- fast python version discovery (py, pyenv-win, PATH) ---------------------
-_VER_RX = re.compile(r"Python\s+(\d+\.\d+\.\d+)")
-
-def _run(*args, cmd: list[str], **kwargs) -> str:
-    try: return subprocess.check_output(cmd, stderr=subprocess.STDOUT).decode().strip()
-    except Exception: return ""
-
-def _from_py_launcher(*args, **kwargs) -> set[str]:
-    out = _run(cmd=["py", "-0p"])
-    return {ln.split(": ", 1)[-1] for ln in out.splitlines() if ": " in ln}
-
-def _from_pyenv(*args, **kwargs) -> set[str]:
-    root = os.path.join(os.path.expanduser("~"), ".pyenv", "pyenv-win", "versions")
-    if not os.path.isdir(root): return set()
-    exes = set()
-    for d in os.listdir(root):
-        p = os.path.join(root, d, "python.exe")
-        if os.path.exists(p): exes.add(p)
-    return exes
-
-def _from_path(*args, **kwargs) -> set[str]:
-    names = [f"python{s}.exe" for s in ("", "3", "3.11", "3.12", "3.13")]
-    out = set()
-    for p in os.environ.get("PATH", "").split(";"):
-        if not p or not os.path.exists(p): continue
-        for n in names:
-            exe = os.path.join(p, n)
-            if os.path.exists(exe): out.add(os.path.abspath(exe))
-    return out
-
-def _version_of(*args, exe: str, **kwargs) -> str | None:
-    m = _VER_RX.search(_run(cmd=[exe, "--version"]))
-    return m.group(1) if m else None
-
-def get_installed_py_versions(*args, **kwargs) -> list[str]:
-    """
-    WHY: Fast & robust. Returns unique X.Y and X.Y.Z strings detected on this host.
-    """
-    exes = set().union(_from_py_launcher(), _from_pyenv(), _from_path())
-    vers = set()
-    for e in exes:
-        v = _version_of(exe=e)
-        if not v: continue
-        mm = ".".join(v.split(".")[:2])
-        vers.add(v); vers.add(mm)
-    # numeric sort for "3.9" < "3.10" < "3.11.9"
-    def _k(s: str): return tuple(int(x) for x in s.split("."))
-    return sorted(vers, key=_k)
+# written into every clone, records the clone parameters and file hashes for proto sync
+clone_record_file = '.clone.json'
 
 def clone_info(*args, **kwargs):
     """
@@ -110,6 +78,21 @@ def clone_info(*args, **kwargs):
     return msg
 
 
+def pipfile_python_version(text: str, py_version: str, *args, **kwargs) -> Tuple[str, bool]:
+    """
+    Pipfile text with its python_version line set to py_version, line endings are kept.
+    Returns the new text and whether a python_version line was found.
+    proto sync applies the same edit to compute the expected Pipfile hash.
+    """
+    lines, found = [], False
+    for line in text.splitlines(keepends=True):
+        if line.strip().startswith('python_version'):
+            ending = line[len(line.rstrip('\r\n')):] or '\n'
+            line, found = f'python_version = "{py_version}"{ending}', True
+        lines.append(line)
+    return ''.join(lines), found
+
+
 def set_python_version_in_pipfile(pipfile_path: str, *args, py_version: str = None, **kwargs) -> None:
     """
     Set the specified Python version in the Pipfile.
@@ -122,97 +105,204 @@ def set_python_version_in_pipfile(pipfile_path: str, *args, py_version: str = No
         return
 
     try:
-        with open(pipfile_path, 'r') as file:
-            lines = file.readlines()
-        
-        with open(pipfile_path, 'w') as file:
-            found_version_line = False
-            for line in lines:
-                if line.strip().startswith('python_version'):
-                    file.write(f'python_version = "{py_version}"\n')
-                    found_version_line = True
-                else:
-                    file.write(line)
-            if not found_version_line: # If python_version was not in [requires]
-                # This part might need adjustment based on Pipfile structure
-                # Assuming it should be under a [requires] section if not present
-                # For simplicity, we'll just print a warning if not found.
-                # A more robust solution might involve parsing the TOML.
-                print(f"{Fore.YELLOW}\tWarning: 'python_version' line not found in Pipfile {pipfile_path}. Version not set.{Fore.RESET}")
-                print(f"{Fore.YELLOW}\tPlease ensure your Pipfile has a '[requires]' section with 'python_version'.{Fore.RESET}")
+        # newline='' keeps the line endings, the result matches pipfile_python_version
+        with open(pipfile_path, 'r', encoding='utf-8', newline='') as file:
+            text, found_version_line = pipfile_python_version(file.read(), py_version)
+        with open(pipfile_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+        if not found_version_line: # If python_version was not in [requires]
+            # This part might need adjustment based on Pipfile structure
+            # Assuming it should be under a [requires] section if not present
+            # For simplicity, we'll just print a warning if not found.
+            # A more robust solution might involve parsing the TOML.
+            print(f"{Fore.YELLOW}\tWarning: 'python_version' line not found in Pipfile {pipfile_path}. Version not set.{Fore.RESET}")
+            print(f"{Fore.YELLOW}\tPlease ensure your Pipfile has a '[requires]' section with 'python_version'.{Fore.RESET}")
     except FileNotFoundError:
         print(f"{Fore.RED}\tError: Pipfile not found at {pipfile_path}{Fore.RESET}")
     except Exception as e:
         print(f"{Fore.RED}\tError updating Pipfile {pipfile_path}: {e}{Fore.RESET}")
 
 
-def rename_files(root: str, file_names: List[str], file_rules: Dict[str, str]) -> None:
-    """
-    Rename files according to specified rules.
+# --- single-pass clone engine -------------------------------------------------
+# every template file is read once, transformed in memory and written once to its
+# final (renamed) path, so no post-copy rename/rewrite passes are needed
+remove_line_marker = '# clone_remove_line'
+# resources/<file> replaces the template version of <file> inside the clone
+resource_files = {"arguments.py": "package", "settings.py": "package", "Readme.md": "project"}
 
-    :param root: The root directory containing the files.
-    :param file_names: List of filenames within the root directory.
-    :param file_rules: Dictionary with old_name:new_name renaming pairs.
+
+def rename_path(rel_path: str, file_rules: Dict[str, str]) -> str:
     """
-    for file_name in file_names:
-        for old_name, new_name in file_rules.items():
-            if new_name is None: continue # Skip if new name is not provided
-            file, ext = os.path.splitext(file_name)
-            if old_name in file: # check if old_name substring is in the filename part
-                repl_name = file_name.replace(old_name, new_name)
-                old_path = os.path.join(root, file_name)
-                new_path = os.path.join(root, repl_name)
-                if os.path.exists(old_path) and old_path != new_path:
-                    print(f"\t{Fore.BLUE}Rename file:{Fore.RESET} {old_path} to {new_path}")
-                    os.rename(old_path, new_path)
-                break # Move to the next file_name once a rule is applied
-
-def rename_dirs(root: str, dirs: List[str], file_rules: Dict[str, str]) -> None:
-    """
-    Rename directories according to specified rules.
-
-    :param root: The root directory containing the subdirectories.
-    :param dirs: List of subdirectory names within the root directory.
+    Apply renaming rules to a template relative path.
+    Directories are renamed on exact name matches, files on substring matches
+    within the file name (without extension). The first matching rule wins.
+
+    :param rel_path: Path relative to the template project directory.
     :param file_rules: Dictionary with old_name:new_name renaming pairs.
     """
-    # Sort dirs by length descending to rename "foo-bar" before "foo" if "foo" is also a rule
-    # This helps prevent partial renames that could break subsequent longer matches.
-    # However, for simple exact matches as implemented, order might not be critical
-    # unless a new_name itself could be an old_name in a subsequent rule for a different dir.
-    # Current logic: only renames if dir_name == old_name.
-    renamed_dirs_this_pass = set() # Keep track of what's been renamed to avoid multiple renames on same dir if new name matches another old rule
-    for dir_name in list(dirs): # Iterate over a copy if modifying `dirs` list, though os.rename doesn't modify the list directly
+    *dir_names, file_name = rel_path.split(os.sep)
+    for i, dir_name in enumerate(dir_names):
         for old_name, new_name in file_rules.items():
-            if new_name is None: continue
-            if dir_name == old_name and old_name not in renamed_dirs_this_pass:
-                old_path = os.path.join(root, old_name)
-                new_path = os.path.join(root, new_name)
-                if os.path.exists(old_path) and old_path != new_path:
-                    print(f"{Fore.BLUE}\tRename directory:{Fore.RESET} {old_path} to {new_path}")
-                    os.rename(old_path, new_path)
-                    renamed_dirs_this_pass.add(new_name) # Add the new name as "processed" from perspective of old names
-                    # Update the 'dirs' list in place if os.walk(topdown=False) re-reads it (it doesn't, it uses initial list)
-                    # This is primarily to prevent trying to rename "old_name" again if it's gone.
-                    # The main protection is `os.path.exists(old_path)`.
+            if new_name is not None and dir_name == old_name:
+                dir_names[i] = new_name
                 break
+    for old_name, new_name in file_rules.items():
+        if new_name is None: continue
+        if old_name in os.path.splitext(file_name)[0]:
+            file_name = file_name.replace(old_name, new_name)
+            break
+    return os.path.join(*dir_names, file_name)
+
+
+def resource_target(rel_path: str, pg_name: str = 'protopy') -> str | None:
+    """
+    Maps template resources (pg_name/resources/*) to their place inside the clone.
+    Returns rel_path for regular files and None for resources that are not cloned.
+    """
+    parts = rel_path.split(os.sep)
+    if parts[:2] != [pg_name, "resources"]:
+        return rel_path
+    if len(parts) != 3 or parts[2] not in resource_files:
+        return None
+    if resource_files[parts[2]] == "project":
+        return parts[2]
+    return os.path.join(pg_name, parts[2])
+
+
+def collect_template(src_dir: str, *args, **kwargs) -> Dict[str, str]:
+    """
+    Walks the template once and decides every file's fate up front.
+    Ignored directories (creator/params.yml) are never descended into and files
+    matching path_patterns are skipped. Renaming is left to rename_path.
+
+    Returns:
+        dict: {template relative target path: source path}
+    """
+    ignored = filters(archive_dirs=get_parameter()['ignore_dirs']).matcher('archive')
+    file_rxs = [re.compile(p) for p in path_patterns['file_patterns']]
+    targets, overrides = {}, set()
+    for d in walk(src_dir, prune=lambda name, path, depth: depth > 0 and ignored(path)):
+        for entry in d.files:
+            file_name = entry.name
+            if any(rx.match(file_name) for rx in file_rxs):
+                continue
+            src_path = os.path.join(d.path, file_name)
+            rel_path = os.path.join(d.rel, file_name)
+            tgt_rel = resource_target(rel_path, project_params["pg_name"])
+            if tgt_rel is None:
+                continue
+            is_resource = tgt_rel != rel_path
+            if tgt_rel in overrides and not is_resource:
+                continue
+            if is_resource:
+                overrides.add(tgt_rel)
+            targets[tgt_rel] = src_path
+    return targets
+
+
+def bundle_tokens(*args, **kwargs) -> List[str]:
+    """
+    All template tokens (project_params values and their case variants) whose
+    offsets are stored in the template bundle.
+    """
+    return list(Replacer({v: v for v in project_params.values()}).table)
 
 
-def remove_files(root: str, file_names: List[str], file_patterns: List[str]) -> None:
+def _materialize_op(o: Operation, *args, bundle_dir: str, root: str, table: Dict[str, str],
+                                                                            **kwargs) -> dict:
+    return open_bundle(bundle_dir).materialize(o.data, os.path.join(root, o.path), table)
+
+
+def template_bundle(src_dir: str, *args, **kwargs) -> TemplateBundle:
+    """
+    The precompiled bundle of the template at src_dir (see creator/bundle.py).
+    """
+    return load_bundle(src_dir, collect_template(src_dir, *args, **kwargs),
+                                            tokens=bundle_tokens(), marker=remove_line_marker)
+
+
+def template_entries(src_dir: str, *args, **kwargs) -> List[dict]:
     """
-    Remove files that match given file_patterns within a specific root directory.
+    Bundle like file entries (rel, src, size, binary) read straight from the template,
+    dry runs plan from these, so no bundle is built or written.
     """
-    for filename in file_names:
-        file_path = os.path.join(root, filename)
-        if any(re.match(pattern, filename) for pattern in file_patterns):
-            if os.path.exists(file_path): # Check existence before removal
-                try:
-                    print(f"{Fore.YELLOW}\tRemove file:{Fore.RESET} {filename}")
-                    os.remove(file_path)
-                    time.sleep(.1) # Brief pause, possibly for filesystem to catch up or visual effect
-                except OSError as e:
-                    print(f"{Fore.RED}\tError removing file {file_path}: {e}{Fore.RESET}")
+    return [{'rel': rel, 'src': os.path.relpath(src_path, src_dir),
+             'size': os.path.getsize(src_path), 'binary': is_binary(src_path)}
+            for rel, src_path in sorted(collect_template(src_dir, *args, **kwargs).items())]
 
 
+def plan_clone(src_dir: str, new_project_path: str, *args, file_rules: Dict[str, str],
+                    bundle: TemplateBundle = None, dry_run: bool | str = None,
+                    **kwargs) -> Tuple[Plan, TemplateBundle | None]:
+    """
+    Builds the complete clone plan in memory, nothing is written yet.
+    Files come from the precompiled template bundle, so only changed templates
+    are read and scanned again. A given bundle is reused as is. A dry run without
+    a bundle plans from the template itself and returns no bundle.
+    """
+    if bundle is None and dry_run:
+        files = template_entries(src_dir, *args, **kwargs)
+    else:
+        bundle = bundle or template_bundle(src_dir, *args, **kwargs)
+        files = bundle.files
+    plan = Plan(new_project_path)
+    items = [(rename_path(entry['rel'], file_rules), entry) for entry in files]
+    for tgt_dir in sorted({os.path.dirname(tgt_rel) for tgt_rel, _ in items}):
+        plan.add('mkdir', tgt_dir)
+    for tgt_rel, entry in items:
+        plan.add('copy' if entry['binary'] else 'write', tgt_rel, src=entry['src'],
+                                                            size=entry['size'], data=entry)
+    return plan, bundle
+
+
+def clone_template(src_dir: str, new_project_path: str, *args, file_rules: Dict[str, str],
+                            text_repls: Dict[str, str], jobs: int = None, pool: str = 'thread',
+                            dry_run: bool | str = None, verbose: int = 0, quiet: bool = False,
+                            **kwargs) -> dict:
+    """
+    Single-pass clone: every file is written exactly once to its final path.
+    The clone is planned first (plan_clone) and then applied, directories first
+    and files on a bounded worker pool (jobs > 1). The report is printed in
+    template order, quiet=True only prints errors and the summary.
+    dry_run prints the plan instead, a string value also serializes it as JSON
+    to that path.
+    """
+    print(f"{Fore.CYAN}Cloning template from '{src_dir}' to '{new_project_path}'...{Fore.RESET}")
+    plan, bundle = plan_clone(src_dir, new_project_path, *args, file_rules=file_rules,
+                                                                dry_run=dry_run, **kwargs)
+    stats = {'files': 0, 'read': 0, 'written': 0, 'binary': 0, 'errors': [], 'digests': {}}
+    if dry_run:
+        print(plan.show(verbose=verbose))
+        if isinstance(dry_run, str):
+            print(f"{Fore.YELLOW}Plan written to:{Fore.RESET} {plan.write(dry_run)}")
+        return stats
+    write = partial(_materialize_op, bundle_dir=bundle.bundle_dir, root=new_project_path,
+                                                    table=compile_replacer(text_repls).table)
+    for o, r, e in plan.apply(write=write, jobs=jobs, pool=pool):
+        if o.op not in ('write', 'copy'): continue
+        entry = o.data
+        if e is not None:
+            print(f"{Fore.RED}\tError processing file {entry['src']}: {e}{Fore.RESET}")
+            stats['errors'].append((bundle.src_path(entry), e))
+            continue
+        stats['files'] += 1
+        stats['read'] += r['read']
+        stats['written'] += r['written']
+        stats['binary'] += entry['binary']
+        stats['digests'][o.path] = r['digest']
+        if quiet: continue
+        if entry['src'] != o.path:
+            print(f"\t{Fore.BLUE}Rename:{Fore.RESET} {entry['src']} to {o.path}")
+        if r['changed']:
+            print(f"{Fore.GREEN}\tUpdated text in:{Fore.RESET} {o.path}")
+        if r['removed_lines']:
+            print(f"{Fore.GREEN}\tRemoved lines in:{Fore.RESET} {o.path}\n"
+                  f"removed_lines = {r['removed_lines']}")
+    print(f"{Fore.GREEN}Cloned {stats['files']} files, {stats['binary']} binary "
+          f"({stats['read']} bytes read, "
+          f"{stats['written']} bytes written).{Fore.RESET}")
+    return stats
+
 def initalize(tgt_dir: str, new_pr_name: str, new_pg_name: str, new_alias: str, yes: bool = False, **kwargs) -> Tuple[str, str, str, str]:
     """
     Initialize and confirm user inputs for the project setup.
@@ -280,106 +370,10 @@ def initalize(tgt_dir: str, new_pr_name: str, new_pg_name: str, new_alias: str,
     return os.path.abspath(tgt_dir), new_pr_name, new_pg_name, new_alias
 
 
-def copy_project(src_dir: str, tgt_dir: str, new_pr_name: str) -> None:
-    """Copies the project using archive_main."""
-    print(f"{Fore.CYAN}Copying project from '{src_dir}' to '{tgt_dir}' and renaming to '{new_pr_name}'...{Fore.RESET}")
-    archive_main(**{
-        'sources': [src_dir],
-        'target': [tgt_dir],
-        'rename': new_pr_name, # This renames the top-level copied folder to new_pr_name
-        'comment': 'protopy initializer',
-        'allYes': True, # Assuming non-interactive copy once confirmed
-        'direct': 1,
-        'verbose': 0 # Set to 1 or higher for more output from archive_main
-    })
-    print(f"{Fore.GREEN}Project copied successfully.{Fore.RESET}")
-
-def copy_resources(tgt_dir: str, new_pr_name: str, pg_name:str='protopy') -> None:
-    """
-    from tgt_dir/new_pr_name/pg_name/resources copy arguments.py and settings.py 
-    into to the new package directory tgt_dir/new_pr_name/pg_name.
-    """
-    pg_dir = os.path.join(tgt_dir, new_pr_name, pg_name)
-    resources_dir = os.path.join(pg_dir, "resources")
-    while not os.path.exists(resources_dir):
-        print(f"{Fore.YELLOW}Resources directory {resources_dir} does not exist. Skipping resource copy.{Fore.RESET}")
-        time.sleep(1) # Brief pause before copying resources, to allow any filesystem operations to settle
-        continue
-    print(f"Found:{Fore.YELLOW}{os.listdir(pg_dir)}{Fore.RESET}")
-
-    # Copy arguments.py and settings.py from resources to the package directory
-    for file_name in ["arguments.py", "settings.py", "Readme.md"]:
-        src_file_path = os.path.join(resources_dir, file_name)
-        if file_name == 'Readme.md':
-            tgt_file_path = os.path.join(tgt_dir, new_pr_name, file_name)
-        else:
-            tgt_file_path = os.path.join(tgt_dir, new_pr_name, pg_name, file_name)
-
-        if os.path.exists(src_file_path):
-            shutil.copy2(src_file_path, tgt_file_path)
-            print(f"{Fore.GREEN}Copied {file_name} to {tgt_file_path}{Fore.RESET}")
-        else:
-            print(f"{Fore.YELLOW}Resource file {src_file_path} does not exist. Skipping copy.{Fore.RESET}")
-    # we can now remove the resources directory
-    try:
-        shutil.rmtree(resources_dir)
-        print(f"{Fore.GREEN}Removed resources directory: {resources_dir}{Fore.RESET}")
-    except Exception as e:
-        print(f"{Fore.RED}Error removing resources directory {resources_dir}: {e}{Fore.RESET}")
-        # Optionally, handle specific exceptions like FileNotFoundError or PermissionError if needed
-
-
-def replace_text_in_files(root: str, file_names: List[str], text_repls: Dict[str, str]) -> None:
-    """
-    Replace specific text patterns in files with new text.
-    """
-    for file_name in file_names:
-        file_path = os.path.join(root, file_name)
-        if os.path.isfile(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                    file_contents = file.read()
-                
-                new_contents = file_contents
-                for old_text, new_text in text_repls.items():
-                    if new_text is None: continue # Don't replace with None
-
-                    # Direct, capitalized, and uppercase matches
-                    new_contents = new_contents.replace(old_text, new_text)
-                    if old_text.islower(): # Only do smart capitalization if old_text is all lower (common for identifiers)
-                        new_contents = new_contents.replace(old_text.capitalize(), new_text.capitalize())
-                    new_contents = new_contents.replace(old_text.upper(), new_text.upper())
-                
-                if new_contents != file_contents:
-                    with open(file_path, 'w', encoding='utf-8') as file:
-                        file.write(new_contents)
-                    print(f"{Fore.GREEN}\tUpdated text in:{Fore.RESET} {file_name}")
-            except Exception as e: # Catch more general exceptions during file processing
-                print(f"{Fore.RED}\tError processing file {file_path}: {e}{Fore.RESET}")
-
-def remove_lines_in_files(root: str, file_names: List[str], *args, **kwargs) -> None:
-    marker = '# clone_remove_line'
-    for file_name in file_names:
-        file_path = os.path.join(root, file_name)
-        if os.path.isfile(file_path):
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                file_contents = file.read()
-            if marker in file_contents:
-                # If the file contains the specific line to remove, process it
-                new_contents, removed_lines = [], []
-                for line in file_contents.splitlines():
-                    if marker in line: # Skip lines with this marker
-                        removed_lines.append(line)
-                    else:
-                        new_contents.append(line)
-                new_contents = '\n'.join(new_contents)
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(new_contents)
-                print(  f"{Fore.GREEN}\tRemoved lines in:{Fore.RESET} {file_name}\n"
-                        f"{removed_lines = }")
-
-def setup_project(n_pr_dir: str, n_pg_name: str, *args, py_version: str = None, install: bool = False, **kwargs_setup) -> None:
+def setup_project(n_pr_dir: str, n_pg_name: str, *args, py_version: str = None, install: bool = False,
+                                            profiler: Profiler = None, **kwargs_setup) -> None:
     """Builds and optionally installs the new project."""
+    profiler = profiler or Profiler('setup_project')
     setup_file = os.path.join(n_pr_dir, "setup.py")
     if not os.path.exists(setup_file):
         print(f"{Fore.YELLOW}No setup.py found in {n_pr_dir}. Skipping build and install steps.{Fore.RESET}")
@@ -402,7 +396,8 @@ def setup_project(n_pr_dir: str, n_pg_name: str, *args, py_version: str = None,
     setup_cmd = [sys.executable, "setup.py", "sdist", "bdist_wheel"] 
     print(f"{Fore.YELLOW}Now running:{Fore.RESET} {' '.join(setup_cmd)} in {n_pr_dir}")
     try:
-        subprocess.check_call(setup_cmd, cwd=n_pr_dir) # Use check_call to raise error on failure
+        with profiler.phase('build'):
+            subprocess.check_call(setup_cmd, cwd=n_pr_dir) # Use check_call to raise error on failure
     except subprocess.CalledProcessError as e:
         print(f"{Fore.RED}Build failed: {e}{Fore.RESET}")
         return # Stop if build fails
@@ -446,7 +441,8 @@ def setup_project(n_pr_dir: str, n_pg_name: str, *args, py_version: str = None,
     pipenv_cmd = ["pipenv", "install", "--dev", "--python", py_version]
     print(f"{Fore.YELLOW}Now running:{Fore.RESET} {' '.join(pipenv_cmd)} in {n_pr_dir}")
     try:
-        subprocess.check_call(pipenv_cmd, cwd=n_pr_dir)
+        with profiler.phase('install'):
+            subprocess.check_call(pipenv_cmd, cwd=n_pr_dir)
     except subprocess.CalledProcessError as e:
         print(f"{Fore.RED}Pipenv install failed: {e}{Fore.RESET}")
         return
@@ -483,11 +479,54 @@ def manage_replacements(old_params: Dict[str, str], new_params: Dict[str, str])
     return text_repls
 
 
-def clone_and_install(*args, **kwargs_received): # Renamed kwargs for clarity
+def clone_rules(new_pr_name: str, new_pg_name: str, new_alias: str | None, port: str | int,
+                                        *args, **kwargs) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Returns (file_rules, text_repls) turning the template into the new project.
+    """
+    # old_params are from the template (global project_params)
+    # new_params uses the same keys but with new values
+    new_params = {
+        "pr_name": new_pr_name,
+        "pg_name": new_pg_name,
+        "alias": new_alias,
+        "port": str(port),
+    }
+    text_repls = manage_replacements(project_params, new_params)
+    # File/directory renaming rules primarily use direct old_name -> new_name mapping
+    # for entities that match the template's names.
+    file_rules = {}
+    for k in ("pr_name", "pg_name", "alias"):
+        if project_params.get(k) and new_params[k]:
+            file_rules[project_params[k]] = new_params[k]
+    return file_rules, text_repls
+
+
+def write_clone_record(new_project_path: str, digests: Dict[str, str], *args, **params) -> str:
+    """
+    Writes clone_record_file into the new project: clone parameters and the content
+    hash of every cloned file. proto sync uses it to tell upstream changes from
+    local ones.
+    """
+    path = os.path.join(new_project_path, clone_record_file)
+    record = {'template_dir': os.path.abspath(sts.project_dir), 'params': params,
+              'files': {rel.replace(os.sep, '/'): d for rel, d in sorted(digests.items())}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=4)
+    return path
+
+
+def load_clone_record(project_path: str, *args, **kwargs) -> dict:
+    with open(os.path.join(project_path, clone_record_file), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def clone_and_install(*args, profiler: Profiler = None, **kwargs_received): # Renamed kwargs for clarity
     """
     Main function to handle the renaming and removal of files and directories
-    based on new project parameters.
+    based on new project parameters. Returns the path of the new project.
     """
+    profiler = profiler or Profiler('clone')
     # Extract parameters for initalize from kwargs_received
     # These keys should ideally match what the CLI argument parser produces (e.g. -pr -> 'new_pr_name' or 'pr')
     # Using .get(key) will default to None if key is missing; initalize handles None by prompting.
@@ -509,62 +548,40 @@ def clone_and_install(*args, **kwargs_received): # Renamed kwargs for clarity
     print(f"  Full Project Path: {new_project_path}")
 
 
-    # Prepare parameters for renaming/replacement
-    # old_params are from the template (global project_params)
-    # new_params_for_replacement uses the same keys but with new values
-    new_params_for_replacement = {
-        "pr_name": new_pr_name,
-        "pg_name": new_pg_name,
-        "alias": new_alias,
-        "port": str(kwargs_received.get('port')),
-    }
-    text_replacements = manage_replacements(project_params, new_params_for_replacement)
-    
-    # File/directory renaming rules primarily use direct old_name -> new_name mapping
-    # for entities that match the template's names.
-    file_renaming_rules = {}
-    if project_params.get("pr_name") and new_pr_name:
-        file_renaming_rules[project_params["pr_name"]] = new_pr_name
-    if project_params.get("pg_name") and new_pg_name:
-        file_renaming_rules[project_params["pg_name"]] = new_pg_name
-    if project_params.get("alias") and new_alias:
-        file_renaming_rules[project_params["alias"]] = new_alias
-
-    copy_project(sts.project_dir, tgt_dir, new_pr_name)
-    copy_resources(tgt_dir, new_pr_name)
-
-    print(f"\n{Fore.BLUE}Starting restructuring in: {new_project_path}{Fore.RESET}")
-    # Iterate topdown=True for dirs so parent is renamed before trying to walk its old name
-    # However, os.walk(topdown=False) is often safer for modifications as you modify leaves first.
-    # For renaming, if you rename a parent, the 'dirs' list for current 'root' might be outdated for subsequent iterations within os.walk.
-    # A common pattern is to walk, collect changes, then apply. Or use topdown=False carefully.
-    # Current rename_dirs/files operate on names *within* the current root, so topdown=False is fine.
-
-    for root, dirs, files in os.walk(new_project_path, topdown=False):
-        print(f"Processing directory: {root}")
-        # Remove unwanted files first
-        remove_files(root, files, path_patterns['file_patterns'])
-        
-        # Rename files, then directories (as file paths depend on directory names)
-        # This order seems fine with topdown=False.
-        rename_files(root, files, file_renaming_rules)
-        rename_dirs(root, dirs, file_renaming_rules)
+    file_renaming_rules, text_replacements = clone_rules(
+        new_pr_name, new_pg_name, new_alias, kwargs_received.get('port'))
 
-    # Second pass for text replacement after all renaming is done
-    print(f"\n{Fore.BLUE}Replacing text content...{Fore.RESET}")
-    for root, dirs, files in os.walk(new_project_path, topdown=True): # topdown=True for text replacement is fine
-        replace_text_in_files(root, files, text_replacements)
-        remove_lines_in_files(root, files)
+    with profiler.phase('clone_template'):
+        stats = clone_template(sts.project_dir, new_project_path,
+                        file_rules=file_renaming_rules, text_repls=text_replacements,
+                        jobs=kwargs_received.get('jobs'), pool=kwargs_received.get('pool') or 'thread',
+                        dry_run=kwargs_received.get('dry_run'),
+                        verbose=kwargs_received.get('verbose') or 0,
+                        bundle=kwargs_received.get('bundle'), quiet=kwargs_received.get('quiet'))
+    profiler.add('clone_template', files=stats['files'], read=stats['read'], written=stats['written'])
+    if kwargs_received.get('dry_run'):
+        print(f"{Fore.YELLOW}Dry run: no project files written, template bundle, Pipfile "
+              f"and setup steps skipped.{Fore.RESET}")
+        return new_project_path
 
     # Extract py_version and install for downstream functions from the original kwargs
     current_py_version = kwargs_received.get('py_version')
     current_install_flag = kwargs_received.get('install', False)
 
     pipfile_full_path = os.path.join(new_project_path, 'Pipfile')
-    set_python_version_in_pipfile(
-        pipfile_full_path,
-        py_version=current_py_version
-    )
+    with profiler.phase('pipfile'):
+        set_python_version_in_pipfile(
+            pipfile_full_path,
+            py_version=current_py_version
+        )
+    if current_py_version is not None and os.path.isfile(pipfile_full_path):
+        size = os.path.getsize(pipfile_full_path)
+        profiler.add('pipfile', files=1, read=size, written=size)
+        # the record holds the Pipfile as written, proto sync re-applies py_version
+        stats['digests']['Pipfile'] = file_digest(pipfile_full_path)
+    write_clone_record(new_project_path, stats['digests'], new_pr_name=new_pr_name,
+                    new_pg_name=new_pg_name, new_alias=new_alias, port=kwargs_received.get('port'),
+                    py_version=current_py_version)
     
     print(f"\n{Fore.CYAN}Debug Info:{Fore.RESET} Project Path='{new_project_path}', Package Name='{new_pg_name}'")
     # print(f"Args: {args}, Kwargs Received by clone_and_install: {kwargs_received}")
@@ -574,12 +591,17 @@ def clone_and_install(*args, **kwargs_received): # Renamed kwargs for clarity
         new_pg_name,
         *args, # Pass original args tuple if setup_project uses them
         py_version=current_py_version,
-        install=current_install_flag
+        install=current_install_flag,
+        profiler=profiler,
     )
+    return new_project_path
 
 def run_checks(*args, install: bool = False, py_version: str = None,
-               port: str | int = None, **kwargs) -> None:
-    """Checks python version format and required port."""
+               port: str | int = None, available: set = None, **kwargs) -> None:
+    """
+    Checks python version format and required port.
+    available (installed python versions) can be passed in to skip the discovery.
+    """
     print(f"{Fore.CYAN}Running pre-checks: install={install}, "
           f"py_version='{py_version or 'Not set'}', port='{port}'{Fore.RESET}")
 
@@ -605,35 +627,141 @@ def run_checks(*args, install: bool = False, py_version: str = None,
                f"Expected '3.11' or '3.11.4'.{Fore.RESET}"))
         sys.exit()
 
-    available = set(get_installed_py_versions())
+    available = set(get_installed_py_versions()) if available is None else available
     if py_version not in available:
         mm = ".".join(py_version.split(".")[:2])
         if mm not in available:
             print(f"{Fore.RED}Error: Python '{py_version}' not found on this system."
                   f"{Fore.RESET}")
             print(f"{Fore.YELLOW}Available: "
-                  f"{', '.join(get_installed_py_versions())}{Fore.RESET}")
+                  f"{', '.join(sorted(available))}{Fore.RESET}")
             sys.exit()
 
-def main(*args, api:str=None, **kwargs) -> str:
+# --- batch clone from a manifest ----------------------------------------------
+manifest_fields = ('new_pr_name', 'new_pg_name', 'new_alias', 'tgt_dir', 'port', 'py_version')
+
+
+def load_manifest(manifest_path: str, *args, **kwargs) -> List[dict]:
+    """
+    Reads a projects manifest (yml). Either a plain list of projects or
+    {'defaults': {...}, 'projects': [...]} where defaults apply to every project.
+    Keys are the clone arguments, i.e. new_pr_name, new_pg_name, new_alias,
+    tgt_dir, port, py_version, install.
+    """
+    with open(os.path.expanduser(manifest_path), 'r') as f:
+        data = yaml.safe_load(f) or []
+    if isinstance(data, list):
+        data = {'projects': data}
+    defaults = data.get('defaults') or {}
+    return [{**defaults, **{k: v for k, v in p.items() if v is not None}}
+                                                            for p in data.get('projects') or []]
+
+
+def check_manifest_entry(entry: dict, *args, available: set, **kwargs) -> str | None:
+    """
+    Returns an error message if a manifest entry cannot be cloned unattended.
+    """
+    missing = [k for k in ('new_pr_name', 'new_pg_name', 'tgt_dir', 'port') if not entry.get(k)]
+    if missing:
+        return f"missing {missing}"
+    if entry['new_pr_name'] == entry['new_pg_name']:
+        return "new_pr_name must differ from new_pg_name"
+    try:
+        run_checks(**{**entry, 'port': str(entry['port']),
+                      'py_version': entry.get('py_version') and str(entry['py_version'])},
+                                                                        available=available)
+    except SystemExit:
+        return "pre-checks failed"
+    return None
+
+
+def _clone_entry(entry: dict, *args, profile: bool = False, **kwargs) -> dict:
+    profiler = Profiler(entry['new_pr_name'])
+    t = time.perf_counter()
+    try:
+        path = clone_and_install(profiler=profiler, **entry)
+    except SystemExit:
+        # initalize and run_checks exit on invalid input, which must not end the batch
+        raise RuntimeError(f"clone of {entry['new_pr_name']} aborted")
+    if profile:
+        report_profile(path, profiler=profiler, **entry)
+    return {'path': path, 'seconds': time.perf_counter() - t,
+            'files': profiler.phases.get('clone_template', {}).get('files', 0)}
+
+
+def clone_manifest(manifest_path: str, *args, jobs: int = None, profile: bool = False,
+                                                                        **kwargs) -> str:
+    """
+    Clones every project of a manifest. Preparation (python discovery and the
+    template bundle) runs once, projects are cloned concurrently on jobs workers.
+    Prints and returns one consolidated report.
+    """
+    entries = load_manifest(manifest_path)
+    base = {k: v for k, v in kwargs.items() if k not in manifest_fields and v is not None}
+    entries = [{**base, **e, 'port': str(e.get('port')) if e.get('port') else None,
+                'yes': True, 'quiet': True, 'jobs': 1} for e in entries]
+    print(f"{Fore.CYAN}Batch clone of {len(entries)} projects from {manifest_path}{Fore.RESET}")
+    # shared preparation, python discovery only if any project needs it
+    available = set(get_installed_py_versions()) if any(e.get('py_version') for e in entries
+                                                                            ) else set()
+    bundle = template_bundle(sts.project_dir)
+    checks = [check_manifest_entry(e, available=available) for e in entries]
+    valid = [i for i, err in enumerate(checks) if err is None]
+    done = run_jobs(_clone_entry, [dict(entries[i], bundle=bundle) for i in valid],
+                                                                jobs=jobs, profile=profile)
+    results = dict(zip(valid, ((r, err) for _, r, err in done)))
+    rows, failed = [], 0
+    for i, e in enumerate(entries):
+        r, err = results.get(i, (None, checks[i]))
+        failed += err is not None
+        rows.append((i, e.get('new_pr_name'), r['path'] if r else e.get('tgt_dir'),
+                     'ok' if err is None else f"error: {err}",
+                     r['files'] if r else '', f"{r['seconds']:.2f}" if r else ''))
+    tbl = tabulate(rows, headers=['#', 'project', 'path', 'status', 'files', 'seconds'],
+                                                                            tablefmt='psql')
+    color = Fore.GREEN if not failed else Fore.RED
+    print(f"\n{color}Batch clone: {len(entries) - failed} ok, {failed} failed{Fore.RESET}\n{tbl}")
+    return tbl
+
+def report_profile(new_project_path: str, *args, profiler: Profiler, **kwargs) -> str:
+    """
+    Prints the phase summary table and writes the JSON report next to new_project_path.
+    """
+    report_path = f"{os.path.normpath(new_project_path)}_clone_profile.json"
+    params = {k: kwargs.get(k) for k in ('new_pr_name', 'new_pg_name', 'new_alias',
+                                                    'py_version', 'install', 'jobs', 'pool')}
+    profiler.write(report_path, project_path=new_project_path, params=params)
+    print(f"\n{Fore.CYAN}Clone profile:{Fore.RESET}\n{profiler.table()}")
+    print(f"{Fore.YELLOW}Profile report:{Fore.RESET} {report_path}")
+    return report_path
+
+def main(*args, api:str=None, profile: bool = False, **kwargs) -> str:
     """
     Main entry point for the clone operation.
     Receives kwargs from the CLI parsing layer.
+    With profile=True a per phase timing table is printed and a JSON report is
+    written next to the new project as <new_pr_name>_clone_profile.json.
     """
+    if kwargs.get('manifest'):
+        return clone_manifest(kwargs.pop('manifest'), *args, profile=profile, **kwargs)
+    profiler = Profiler('clone')
     # This print helps to see what arguments this main function actually received.
     print(f"{Fore.MAGENTA}Initiating clone process with arguments: args={args}, kwargs={kwargs}{Fore.RESET}")
 
     # run_checks will use defaults if 'install' or 'py_version' are not in kwargs,
     # or use values from kwargs if provided.
-    run_checks(*args, **kwargs)
+    with profiler.phase('checks'):
+        run_checks(*args, **kwargs)
     _k = '\n' + '\n'.join([f"{k}: {v}" for k, v in kwargs.items()])
     logprint(f"cloning '{kwargs.get('new_pr_name')}':{_k}", level='warning', console_log=False)
     # clone_and_install will:
     # 1. Extract specific parameters for `initalize` from kwargs (e.g. 'tgt_dir', 'new_pr_name').
     #    If not found, `initalize` will prompt the user.
     # 2. Pass specific extracted parameters (e.g. 'py_version', 'install') to downstream functions.
-    clone_and_install(*args, **kwargs)
-    
+    new_project_path = clone_and_install(*args, profiler=profiler, **kwargs)
+    if profile:
+        report_profile(new_project_path, *args, profiler=profiler, **kwargs)
+
     success_message = f"{Fore.GREEN}Cloning process completed successfully!{Fore.RESET}"
     print(f"\n{success_message}")
     return "Clone successful"
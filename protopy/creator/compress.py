@@ -0,0 +1,161 @@
+# compress.py
+"""
+Streaming compressed archive output for archive.py (--format tar.gz|tar.xz|zip).
+The source walk is written straight into one archive file, no intermediate tree.
+
+tar.gz and tar.xz are compressed in independent blocks on a thread pool (zlib and
+lzma release the GIL). Every block becomes its own gzip member / xz stream, the
+concatenation is a valid .gz / .xz file for all standard tools (like pigz).
+zip compresses member by member as zipfile does (zf.write, so the members keep
+their mtime and mode).
+"""
+
+import gzip, lzma, os, tarfile, zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+
+from protopy.helpers.workers import normalize_jobs
+from protopy.creator.checksums import HashingReader, hash_file, manifest_entry
+
+formats = {'tar.gz': '.tar.gz', 'tar.xz': '.tar.xz', 'zip': '.zip'}
+default_level = 6
+block_size = 4 << 20
+
+
+def _gz_block(data: bytes, level: int) -> bytes:
+    # mtime=0 keeps the output reproducible
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _xz_block(data: bytes, level: int) -> bytes:
+    return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+
+
+class BlockCompressor:
+    """
+    Write-only file object, compresses fixed size blocks concurrently and writes
+    them to fileobj in order. At most jobs * 2 blocks are held in memory.
+    """
+
+    def __init__(self, fileobj, fmt: str, *args, level: int = default_level, jobs: int = None,
+                                                                                    **kwargs):
+        self.fileobj, self.level = fileobj, level
+        self.compress = _xz_block if fmt == 'tar.xz' else _gz_block
+        self.jobs = normalize_jobs(jobs)
+        self.ex = ThreadPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        self.buf, self.pending = bytearray(), deque()
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.buf += data
+        while len(self.buf) >= block_size:
+            self._submit(bytes(self.buf[:block_size]))
+            del self.buf[:block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        if self.ex is None:
+            self._out(self.compress(block, self.level))
+            return
+        self.pending.append(self.ex.submit(self.compress, block, self.level))
+        while len(self.pending) > self.jobs * 2:
+            self._out(self.pending.popleft().result())
+
+    def _out(self, block: bytes) -> None:
+        self.fileobj.write(block)
+        self.written += len(block)
+
+    def close(self) -> None:
+        try:
+            if self.buf:
+                self._submit(bytes(self.buf))
+                self.buf = bytearray()
+            while self.pending:
+                self._out(self.pending.popleft().result())
+        finally:
+            if self.ex is not None:
+                self.ex.shutdown(cancel_futures=True)
+
+    def abort(self) -> None:
+        # nothing more is written, the caller drops the output
+        self.buf, self.pending = bytearray(), deque()
+        if self.ex is not None:
+            self.ex.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "BlockCompressor":
+        return self
+
+    def __exit__(self, exc_type, *args, **kwargs) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_archive(files: Iterable[Tuple[str, str]], out_path: str, fmt: str, *args,
+                    level: int = None, jobs: int = None, checksums: bool = False,
+                                                    **kwargs) -> Tuple[int, List[tuple], dict]:
+    """
+    Streams (src_path, arcname) pairs into out_path. With checksums every member is
+    hashed while it is streamed into the archive. The archive is written to
+    <out_path>.part first, which is removed again if writing fails.
+    Files that can not be opened are reported in errors and skipped, a read error
+    after a member was started aborts the archive (no truncated members).
+
+    Returns:
+        tuple: (number of files written, [(src_path, error), ...], {arcname: manifest entry})
+    """
+    level = default_level if level is None else level
+    tmp_path = f"{out_path}.part"
+    try:
+        out = _write_members(files, tmp_path, fmt, level=level, jobs=jobs, checksums=checksums)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return out
+
+
+def _write_members(files: Iterable[Tuple[str, str]], tmp_path: str, fmt: str, *args,
+        level: int, jobs: int = None, checksums: bool = False, **kwargs
+                                                        ) -> Tuple[int, List[tuple], dict]:
+    count, errors, hashes = 0, [], {}
+    with open(tmp_path, 'wb') as raw:
+        if fmt == 'zip':
+            with zipfile.ZipFile(raw, 'w', compression=zipfile.ZIP_DEFLATED,
+                                                        compresslevel=level) as zf:
+                for src_path, arcname in files:
+                    arcname = arcname.replace(os.sep, '/')
+                    try:
+                        # open first, so an unreadable file never starts a member
+                        open(src_path, 'rb').close()
+                    except OSError as e:
+                        errors.append((src_path, e))
+                        continue
+                    # zf.write applies the ZipFile compression and compresslevel
+                    zf.write(src_path, arcname)
+                    if checksums:
+                        # zipfile has no read hook, zip members are hashed in a second read
+                        hashes[arcname] = manifest_entry(src_path, hash_file(src_path))
+                    count += 1
+        else:
+            # 'w|' is tarfile's pure streaming mode, nothing is seeked or buffered
+            with BlockCompressor(raw, fmt, level=level, jobs=jobs) as out, \
+                                        tarfile.open(fileobj=out, mode='w|') as tar:
+                for src_path, arcname in files:
+                    arcname = arcname.replace(os.sep, '/')
+                    try:
+                        # open first, so an unreadable file never starts a member
+                        f = open(src_path, 'rb')
+                    except OSError as e:
+                        errors.append((src_path, e))
+                        continue
+                    with f:
+                        reader = HashingReader(f) if checksums else f
+                        tar.addfile(tar.gettarinfo(arcname=arcname, fileobj=f), reader)
+                    if checksums:
+                        hashes[arcname] = manifest_entry(src_path, reader.hexdigest())
+                    count += 1
+    return count, errors, hashes
@@ -0,0 +1,122 @@
+# interpreters.py
+"""
+WHY: Python interpreter discovery for clone (run_checks, clone_info).
+- candidates come from the py launcher, pyenv / pyenv-win and PATH (Windows and POSIX)
+- 'exe --version' probes run concurrently
+- results are cached in sts.resources_dir keyed by executable path + size + mtime,
+  so only new or changed interpreters are probed again
+- the candidate listing itself is not cached, installed or removed pythons show up at once
+"""
+
+import json, os, re, subprocess
+from typing import Dict, List
+
+import protopy.settings as sts
+from protopy.helpers.workers import run_jobs
+
+_VER_RX = re.compile(r"Python\s+(\d+\.\d+\.\d+)")
+# python, python3, python3.12 with or without .exe, no python3-config etc.
+_EXE_RX = re.compile(r"^python(3(\.\d+)?)?(\.exe)?$", re.IGNORECASE)
+
+
+def cache_path(*args, **kwargs) -> str:
+    # resolved per call, sts.resources_dir can be redirected (i.e. by tests)
+    return os.path.join(sts.resources_dir, "interpreters.json")
+
+
+def _run(*args, cmd: list[str], **kwargs) -> str:
+    try: return subprocess.check_output(cmd, stderr=subprocess.STDOUT).decode().strip()
+    except Exception: return ""
+
+def _from_py_launcher(*args, **kwargs) -> set[str]:
+    if os.name != "nt": return set()
+    out = _run(cmd=["py", "-0p"])
+    return {ln.split(": ", 1)[-1].strip() for ln in out.splitlines() if ": " in ln}
+
+def _from_pyenv(*args, **kwargs) -> set[str]:
+    root = os.environ.get("PYENV_ROOT") or os.path.join(os.path.expanduser("~"), ".pyenv")
+    exes = set()
+    # pyenv-win: versions/<v>/python.exe, pyenv: versions/<v>/bin/python
+    for versions, exe in ((os.path.join(root, "pyenv-win", "versions"), "python.exe"),
+                          (os.path.join(root, "versions"), os.path.join("bin", "python"))):
+        if not os.path.isdir(versions): continue
+        for d in os.scandir(versions):
+            p = os.path.join(d.path, exe)
+            if os.path.isfile(p): exes.add(p)
+    return exes
+
+def _from_path(*args, **kwargs) -> set[str]:
+    out = set()
+    for p in os.environ.get("PATH", "").split(os.pathsep):
+        if not p or not os.path.isdir(p): continue
+        # pyenv shims only forward to the versions found above
+        if os.path.basename(p) == "shims": continue
+        try:
+            with os.scandir(p) as it:
+                for e in it:
+                    if _EXE_RX.match(e.name) and e.is_file():
+                        out.add(os.path.abspath(e.path))
+        except OSError:
+            continue
+    return out
+
+def _version_of(*args, exe: str, **kwargs) -> str | None:
+    m = _VER_RX.search(_run(cmd=[exe, "--version"]))
+    return m.group(1) if m else None
+
+def find_interpreters(*args, **kwargs) -> set[str]:
+    """
+    Candidate executables, symlinks (python3 -> python3.12) are resolved and deduped.
+    """
+    exes = set().union(_from_py_launcher(), _from_pyenv(), _from_path())
+    return {os.path.realpath(e) for e in exes if os.path.isfile(e)}
+
+
+def _load_cache(*args, **kwargs) -> Dict[str, list]:
+    try:
+        with open(cache_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(entries: Dict[str, list], *args, **kwargs) -> None:
+    path = cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=4)
+    os.replace(tmp, path)
+
+
+def interpreter_versions(*args, refresh: bool = False, **kwargs) -> Dict[str, str]:
+    """
+    {executable: 'X.Y.Z'}. Cached executables whose size and mtime are unchanged
+    are not executed again, all others are probed concurrently.
+    """
+    cache = {} if refresh else _load_cache()
+    entries, probe = {}, []
+    for exe in find_interpreters():
+        st = os.stat(exe)
+        hit = cache.get(exe)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            entries[exe] = hit
+        else:
+            probe.append((exe, st))
+    for (exe, st), v, e in run_jobs(lambda item: _version_of(exe=item[0]), probe,
+                                                                    jobs=len(probe) or 1):
+        entries[exe] = [st.st_size, st.st_mtime_ns, v if e is None else None]
+    if entries != cache:
+        _save_cache(entries)
+    return {exe: v for exe, (_, _, v) in entries.items() if v}
+
+
+def get_installed_py_versions(*args, **kwargs) -> List[str]:
+    """
+    WHY: Fast & robust. Returns unique X.Y and X.Y.Z strings detected on this host.
+    """
+    vers = set()
+    for v in interpreter_versions(*args, **kwargs).values():
+        vers.add(v); vers.add(".".join(v.split(".")[:2]))
+    # numeric sort for "3.9" < "3.10" < "3.11.9"
+    def _k(s: str): return tuple(int(x) for x in s.split("."))
+    return sorted(vers, key=_k)
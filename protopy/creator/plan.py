@@ -0,0 +1,116 @@
+# plan.py
+"""
+Plan-then-apply file system operations for clone (and sync).
+A plan is built completely in memory before anything is touched, so it can be
+printed or serialized (--dry_run) and then applied in an optimized order:
+directories first (leaf dirs only), renames, batched writes on a worker pool,
+deletes last.
+"""
+
+import json, os
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List
+
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from protopy.helpers.workers import run_jobs
+
+# apply order of operation kinds
+op_order = ('mkdir', 'rename', 'write', 'copy', 'delete')
+
+
+@dataclass
+class Operation:
+    op: str
+    path: str
+    src: str | None = None
+    size: int = 0
+    # payload for the writer (i.e. a bundle entry), never serialized
+    data: Any = field(default=None, repr=False, compare=False)
+
+    def to_dict(self, *args, **kwargs) -> dict:
+        d = asdict(self)
+        d.pop('data')
+        return d
+
+
+@dataclass
+class Plan:
+    root: str
+    ops: List[Operation] = field(default_factory=list)
+
+    def add(self, op: str, path: str, *args, **kwargs) -> Operation:
+        assert op in op_order, f"unknown operation {op}, use one of {op_order}"
+        o = Operation(op, path, *args, **kwargs)
+        self.ops.append(o)
+        return o
+
+    def of(self, op: str, *args, **kwargs) -> List[Operation]:
+        return [o for o in self.ops if o.op == op]
+
+    def totals(self, *args, **kwargs) -> Dict[str, Dict[str, int]]:
+        t = {op: {'count': 0, 'size': 0} for op in op_order}
+        for o in self.ops:
+            t[o.op]['count'] += 1
+            t[o.op]['size'] += o.size
+        return t
+
+    def to_dict(self, *args, **kwargs) -> dict:
+        return {'root': self.root, 'totals': self.totals(),
+                'ops': [o.to_dict() for o in self.ops], **kwargs}
+
+    def write(self, path: str, *args, **kwargs) -> str:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(*args, **kwargs), f, indent=4)
+        return path
+
+    def show(self, *args, verbose: int = 0, **kwargs) -> str:
+        """
+        Summary per operation kind, with verbose >= 1 every single operation.
+        """
+        rows = [(op, t['count'], t['size']) for op, t in self.totals().items() if t['count']]
+        out = [f"{Fore.CYAN}Plan for:{Style.RESET_ALL} {self.root}",
+               tabulate(rows, headers=['op', 'count', 'size [B]'], tablefmt='psql')]
+        if verbose >= 1:
+            out.append(tabulate([(o.op, o.path, o.src or '', o.size) for o in self.ops],
+                                headers=['op', 'path', 'src', 'size [B]'], tablefmt='simple'))
+        return '\n'.join(out)
+
+    def leaf_dirs(self, *args, **kwargs) -> List[str]:
+        """
+        mkdir targets that are not parents of other mkdir targets,
+        makedirs creates the parents along the way.
+        """
+        dirs = {os.path.normpath(os.path.join(self.root, o.path)) for o in self.of('mkdir')}
+        parents = set()
+        for d in dirs:
+            while (d := os.path.dirname(d)) not in parents and d != os.path.dirname(d):
+                parents.add(d)
+        return sorted(dirs - parents)
+
+    def apply(self, *args, write: Callable, jobs: int = None, pool: str = 'thread',
+                                                                    **kwargs) -> List[tuple]:
+        """
+        Applies the plan. write(operation) handles 'write' and 'copy' operations
+        and runs on the worker pool. Returns [(operation, result, error), ...]
+        in plan order.
+        """
+        results = []
+        for d in self.leaf_dirs():
+            os.makedirs(d, exist_ok=True)
+        for o in self.of('rename'):
+            try:
+                os.replace(os.path.join(self.root, o.src), os.path.join(self.root, o.path))
+                results.append((o, None, None))
+            except OSError as e:
+                results.append((o, None, e))
+        writes = [o for o in self.ops if o.op in ('write', 'copy')]
+        results.extend(run_jobs(write, writes, jobs=jobs, pool=pool))
+        for o in self.of('delete'):
+            try:
+                os.remove(os.path.join(self.root, o.path))
+                results.append((o, None, None))
+            except OSError as e:
+                results.append((o, None, e))
+        return results
@@ -0,0 +1,72 @@
+# profiler.py
+"""
+Phase profiler for clone runs.
+Records wall time, cpu time (including child processes like setup.py or pipenv),
+files touched and bytes read/written per phase and renders them as a table or
+a machine-readable JSON report.
+"""
+
+import json, os, time
+from contextlib import contextmanager
+from datetime import datetime as dt
+from tabulate import tabulate
+
+
+def _cpu_time() -> float:
+    t = os.times()
+    # children times are 0 on Windows, process_time covers this process there
+    return time.process_time() + t.children_user + t.children_system
+
+
+class Profiler:
+
+    def __init__(self, name: str, *args, **kwargs):
+        self.name = name
+        self.started = dt.now().isoformat(timespec='seconds')
+        self.phases = {}
+
+    def _record(self, name: str) -> dict:
+        return self.phases.setdefault(name, {
+            'wall_s': 0.0, 'cpu_s': 0.0, 'files': 0, 'read': 0, 'written': 0, 'calls': 0,
+            })
+
+    @contextmanager
+    def phase(self, name: str, *args, **kwargs):
+        """
+        Times the enclosed block, repeated phases accumulate.
+        """
+        rec = self._record(name)
+        wall, cpu = time.perf_counter(), _cpu_time()
+        try:
+            yield rec
+        finally:
+            rec['wall_s'] += time.perf_counter() - wall
+            rec['cpu_s'] += _cpu_time() - cpu
+            rec['calls'] += 1
+
+    def add(self, name: str, *args, files: int = 0, read: int = 0, written: int = 0,
+                                                                            **kwargs) -> None:
+        rec = self._record(name)
+        rec['files'] += files
+        rec['read'] += read
+        rec['written'] += written
+
+    def report(self, *args, **kwargs) -> dict:
+        total = {k: sum(p[k] for p in self.phases.values())
+                                for k in ('wall_s', 'cpu_s', 'files', 'read', 'written')}
+        return {'name': self.name, 'started': self.started, 'phases': self.phases,
+                'total': total, **kwargs}
+
+    def table(self, *args, **kwargs) -> str:
+        rows = [(n, f"{p['wall_s']:.3f}", f"{p['cpu_s']:.3f}", p['files'], p['read'],
+                                                p['written']) for n, p in self.phases.items()]
+        t = self.report()['total']
+        rows.append(('total', f"{t['wall_s']:.3f}", f"{t['cpu_s']:.3f}", t['files'], t['read'],
+                                                                                    t['written']))
+        return tabulate(rows, headers=['phase', 'wall [s]', 'cpu [s]', 'files', 'read [B]',
+                                                            'written [B]'], tablefmt='psql')
+
+    def write(self, path: str, *args, **kwargs) -> str:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(*args, **kwargs), f, indent=4)
+        return path
@@ -0,0 +1,173 @@
+# scheduler.py
+"""
+Long running archive scheduler (proto schedule), replaces cron-ing proto archive.
+
+Every interval an incremental snapshot (archive.py --incremental) is taken with
+lowered cpu/io priority and a token bucket bytes/second cap, then the retention
+policy prunes old snapshot dirs. Settings come from params.yml 'schedule' and can
+be overridden by --interval (minutes) and --bwlimit (bytes/second).
+
+Retention keeps the newest snapshot of each of the last N hours, days and ISO
+weeks (params.yml schedule.retention), the latest snapshot is always kept.
+"""
+
+import os, shutil, sys, time
+from datetime import datetime as dt
+from typing import Dict, List, Tuple
+
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from protopy.creator.archive import find_resumable, get_parameter, load_journal, journal_name
+from protopy.creator.archive import main as archive_main
+
+snapshot_format = '%Y-%m-%d-%H-%M-%S-%f'
+periods = {
+    'hourly': lambda t: (t.year, t.month, t.day, t.hour),
+    'daily': lambda t: (t.year, t.month, t.day),
+    'weekly': lambda t: t.isocalendar()[:2],
+}
+
+
+def lower_priority(*args, **kwargs) -> str:
+    """
+    Background priority for this process, io priority follows on Windows and on
+    Linux io schedulers that derive it from the nice value.
+    """
+    try:
+        if hasattr(os, 'nice'):
+            os.nice(10)
+            return 'nice +10'
+        if sys.platform == 'win32':
+            import ctypes
+            k32 = ctypes.windll.kernel32
+            # PROCESS_MODE_BACKGROUND_BEGIN lowers cpu, io and memory priority
+            k32.SetPriorityClass(k32.GetCurrentProcess(), 0x00100000)
+            return 'background mode'
+    except (OSError, AttributeError):
+        pass
+    return 'unchanged'
+
+
+def snapshot_time(name: str, *args, **kwargs) -> dt | None:
+    # names look like 2026-01-01-10-00-00-000000_comment (see archive.mk_tgt_dir)
+    try:
+        return dt.strptime(name.split('_', 1)[0], snapshot_format)
+    except ValueError:
+        return None
+
+
+def list_snapshots(archive_dir: str, *args, **kwargs) -> List[Tuple[dt, str]]:
+    """
+    [(timestamp, path), ...] newest first.
+    """
+    if not os.path.isdir(archive_dir):
+        return []
+    out = []
+    with os.scandir(archive_dir) as it:
+        for e in it:
+            if e.is_dir() and (t := snapshot_time(e.name)) is not None:
+                out.append((t, e.path))
+    return sorted(out, reverse=True)
+
+
+def select_prunable(snapshots: List[Tuple[dt, str]], retention: Dict[str, int], *args,
+                                                                    **kwargs) -> List[str]:
+    """
+    Snapshots not kept by any retention period, snapshots must be newest first.
+    """
+    keep = {snapshots[0][1]} if snapshots else set()
+    for period, n in (retention or {}).items():
+        seen = []
+        for t, path in snapshots:
+            key = periods[period](t)
+            if key in seen:
+                continue
+            if len(seen) >= n:
+                break
+            seen.append(key)
+            keep.add(path)
+    return [path for _, path in snapshots if path not in keep]
+
+
+def dir_size(path: str, *args, **kwargs) -> Tuple[int, int]:
+    """
+    (total bytes, bytes freed on delete) via scandir, stat results come with the
+    directory listing on Windows. Files hardlinked into other snapshots are not freed.
+    """
+    total = freed = 0
+    stack = [path]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                        continue
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                total += st.st_size
+                if st.st_nlink <= 1:
+                    freed += st.st_size
+    return total, freed
+
+
+def prune(archive_dir: str, retention: Dict[str, int], *args, dry_run: bool = False,
+                                                                    **kwargs) -> List[tuple]:
+    """
+    Deletes snapshots outside the retention policy. Interrupted snapshots (journal
+    without terminal record) are never pruned. Returns [(path, total, freed), ...].
+    """
+    pruned = []
+    for path in select_prunable(list_snapshots(archive_dir), retention):
+        if os.path.isfile(os.path.join(path, journal_name)) and not load_journal(path)[1]:
+            continue
+        total, freed = dir_size(path)
+        if not dry_run:
+            shutil.rmtree(path, ignore_errors=True)
+        pruned.append((path, total, freed))
+    return pruned
+
+
+def run_once(*args, archive_dir: str, retention: Dict[str, int], **kwargs) -> List[tuple]:
+    """
+    One scheduled round: incremental snapshot (resuming an interrupted one), then prune.
+    """
+    archive_main(*args, **{**kwargs, 'incremental': True, 'direct': False,
+                            'resume': find_resumable(archive_dir) is not None,
+                            'comment': kwargs.get('comment') or 'scheduled_snapshot'})
+    pruned = prune(archive_dir, retention)
+    if pruned:
+        print(tabulate([(os.path.basename(p), t, f) for p, t, f in pruned],
+                        headers=['pruned', 'size [B]', 'freed [B]'], tablefmt='psql'))
+    return pruned
+
+
+def main(*args, interval: float = None, bwlimit: int = None, once: bool = False, **kwargs) -> str:
+    params = get_parameter()
+    schedule = params.get('schedule') or {}
+    interval = float(interval or schedule.get('interval_minutes') or 60) * 60
+    bwlimit = bwlimit if bwlimit is not None else schedule.get('bwlimit') or None
+    targets = kwargs.get('target') or params['defaultTargets']
+    target = next((t for t in targets if os.path.exists(os.path.join(t, 'archive'))), None)
+    assert target, f"None of the required archive Targets was found: {targets}"
+    archive_dir = os.path.join(target, 'archive')
+    print(f"{Fore.CYAN}Archive scheduler:{Style.RESET_ALL} every {interval / 60:g} min into "
+          f"{archive_dir}, bwlimit: {bwlimit or 'none'} B/s, priority: {lower_priority()}, "
+          f"retention: {schedule.get('retention')}")
+    while True:
+        started = time.monotonic()
+        try:
+            run_once(*args, archive_dir=archive_dir, retention=schedule.get('retention'),
+                            **{**kwargs, 'target': [target], 'bwlimit': bwlimit})
+        except Exception as e:
+            # a failed round must not end the scheduler, the next round resumes it
+            print(f"{Fore.RED}Scheduled archive failed: {e}{Style.RESET_ALL}")
+        if once:
+            return "Scheduled archive done"
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,179 @@
+# sync.py
+"""
+Incremental template sync for already cloned projects (proto sync).
+
+Every clone carries a clone record (clone.clone_record_file) with its clone
+parameters and the content hash of every cloned file. sync re-renders the current
+template with these parameters in memory and compares three hashes per file:
+    recorded (at clone/last sync), upstream (template now), local (file on disk)
+Only files that changed upstream and were left untouched locally are written,
+files removed upstream are deleted if untouched. Locally modified files are kept
+and reported as conflicts.
+"""
+
+import os
+from functools import partial
+from typing import Dict, List, Tuple
+
+from colorama import Fore, Style
+from tabulate import tabulate
+
+import protopy.settings as sts
+from protopy.creator.bundle import TemplateBundle, digest, file_digest
+from protopy.creator.clone import (clone_record_file, clone_rules, load_clone_record,
+                                   pipfile_python_version, plan_clone,
+                                   set_python_version_in_pipfile, template_bundle,
+                                   write_clone_record, _materialize_op)
+from protopy.creator.plan import Plan
+from protopy.helpers.replacer import compile_replacer
+
+
+def find_projects(tgt_dir: str, *args, **kwargs) -> List[str]:
+    """
+    tgt_dir itself if it is a cloned project, otherwise all cloned projects directly below it.
+    """
+    if os.path.isfile(os.path.join(tgt_dir, clone_record_file)):
+        return [tgt_dir]
+    with os.scandir(tgt_dir) as it:
+        return sorted(e.path for e in it if e.is_dir()
+                                    and os.path.isfile(os.path.join(e.path, clone_record_file)))
+
+
+def upstream_digest(bundle: TemplateBundle, entry: dict, rel: str, table: Dict[str, str],
+                                            *args, py_version: str = None, **kwargs) -> str:
+    """
+    Content hash of the file as clone writes it, the Pipfile with its py_version set.
+    """
+    if rel != 'Pipfile' or not py_version or entry['binary']:
+        return bundle.target_digest(entry, table)
+    text = bundle.render(entry, table)[0].decode('utf-8', errors='ignore')
+    return digest(pipfile_python_version(text, py_version)[0].encode('utf-8'))
+
+
+def plan_sync(project_path: str, *args, bundle: TemplateBundle = None, **kwargs
+                                                    ) -> Tuple[Plan, List[tuple], dict, dict]:
+    """
+    Compares recorded, upstream and local hashes, nothing is written yet.
+
+    Returns:
+        tuple: (plan, [(action, path), ...], updated record files, record)
+    """
+    record = load_clone_record(project_path)
+    p = record['params']
+    file_rules, text_repls = clone_rules(p['new_pr_name'], p['new_pg_name'], p.get('new_alias'),
+                                                                                    p.get('port'))
+    table = compile_replacer(text_repls).table
+    upstream, bundle = plan_clone(sts.project_dir, project_path, file_rules=file_rules,
+                                                                                bundle=bundle)
+    recorded = record['files']
+    files, actions, plan = {}, [], Plan(project_path)
+    for o in upstream.ops:
+        if o.op not in ('write', 'copy'): continue
+        key = o.path.replace(os.sep, '/')
+        new_h = upstream_digest(bundle, o.data, key, table, py_version=p.get('py_version'))
+        old_h = recorded.get(key)
+        files[key] = old_h
+        if new_h == old_h:
+            continue # unchanged upstream, local edits and deletions are kept
+        tgt_path = os.path.join(project_path, o.path)
+        cur_h = file_digest(tgt_path) if os.path.isfile(tgt_path) else None
+        if cur_h == new_h:
+            files[key] = new_h
+        elif cur_h == old_h:
+            # untouched locally (or new upstream and not present locally)
+            if os.path.dirname(o.path):
+                plan.add('mkdir', os.path.dirname(o.path))
+            plan.add(o.op, o.path, src=o.src, size=o.size, data=o.data)
+            files[key] = new_h
+            actions.append(('add' if old_h is None else 'update', o.path))
+        else:
+            actions.append(('conflict, deleted locally' if cur_h is None
+                                                        else 'conflict, modified locally', o.path))
+    for key in recorded.keys() - files.keys():
+        path = key.replace('/', os.sep)
+        tgt_path = os.path.join(project_path, path)
+        if not os.path.isfile(tgt_path):
+            continue
+        if file_digest(tgt_path) == recorded[key]:
+            plan.add('delete', path)
+            actions.append(('delete', path))
+        else:
+            files[key] = recorded[key]
+            actions.append(('conflict, removed upstream', path))
+    return plan, actions, {k: v for k, v in files.items() if v is not None}, record
+
+
+def sync_project(project_path: str, *args, bundle: TemplateBundle = None, jobs: int = None,
+                    pool: str = 'thread', dry_run: bool | str = None, verbose: int = 0,
+                                                                        **kwargs) -> dict:
+    """
+    Syncs one cloned project with the current template.
+    Returns {'written': n, 'deleted': n, 'conflicts': n, 'errors': [...]}.
+    """
+    plan, actions, files, record = plan_sync(project_path, bundle=bundle)
+    stats = {'written': 0, 'deleted': 0, 'conflicts': sum(a.startswith('conflict')
+                                                                for a, _ in actions), 'errors': []}
+    if actions:
+        print(f"{Fore.CYAN}{project_path}{Fore.RESET}\n"
+              f"{tabulate(actions, headers=['action', 'path'], tablefmt='simple')}")
+    if dry_run:
+        # planned counts, nothing is touched
+        stats['written'] = len(plan.of('write')) + len(plan.of('copy'))
+        stats['deleted'] = len(plan.of('delete'))
+        if verbose:
+            print(plan.show(verbose=verbose))
+        if isinstance(dry_run, str):
+            plan.write(dry_run)
+        return stats
+    p = record['params']
+    table = compile_replacer(clone_rules(p['new_pr_name'], p['new_pg_name'], p.get('new_alias'),
+                                                                            p.get('port'))[1]).table
+    bundle = bundle or template_bundle(sts.project_dir)
+    write = partial(_materialize_op, bundle_dir=bundle.bundle_dir, root=project_path, table=table)
+    for o, r, e in plan.apply(write=write, jobs=jobs, pool=pool):
+        if o.op == 'mkdir': continue
+        key = o.path.replace(os.sep, '/')
+        if e is not None:
+            print(f"{Fore.RED}\tError syncing {o.path}: {e}{Fore.RESET}")
+            stats['errors'].append((o.path, e))
+            # keep the recorded state, the file is retried on the next sync
+            if key in record['files']:
+                files[key] = record['files'][key]
+            else:
+                files.pop(key, None)
+        elif o.op == 'delete':
+            stats['deleted'] += 1
+        else:
+            if key == 'Pipfile' and p.get('py_version'):
+                set_python_version_in_pipfile(os.path.join(project_path, o.path),
+                                                                py_version=p['py_version'])
+            stats['written'] += 1
+    if files != record['files']:
+        write_clone_record(project_path, files, **p)
+    return stats
+
+
+def main(*args, tgt_dir: str = None, jobs: int = None, pool: str = None,
+                            dry_run: bool | str = None, verbose: int = 0, **kwargs) -> str:
+    """
+    Syncs the cloned project at tgt_dir, or every cloned project directly below tgt_dir.
+    """
+    projects = find_projects(os.path.expanduser(tgt_dir or os.getcwd()))
+    if not projects:
+        print(f"{Fore.RED}No cloned project ({clone_record_file}) found in {tgt_dir}{Fore.RESET}")
+        return "Nothing to sync"
+    # the template is bundled once for all projects
+    bundle = template_bundle(sts.project_dir)
+    rows = []
+    for project_path in projects:
+        try:
+            s = sync_project(project_path, bundle=bundle, jobs=jobs, pool=pool or 'thread',
+                                                        dry_run=dry_run, verbose=verbose or 0)
+            rows.append((os.path.basename(project_path), s['written'], s['deleted'],
+                                    s['conflicts'], len(s['errors'])))
+        except (OSError, KeyError, ValueError) as e:
+            rows.append((os.path.basename(project_path), '', '', '', f"{type(e).__name__}: {e}"))
+    mode = f"{Fore.YELLOW}dry run{Fore.RESET} " if dry_run else ''
+    print(f"\n{Fore.GREEN}Synced {len(projects)} project(s){Fore.RESET} {mode}with {sts.project_dir}"
+          f"\n{tabulate(rows, headers=['project', 'written', 'deleted', 'conflicts', 'errors'], tablefmt='psql')}")
+    return "Sync done"
@@ -6,6 +6,8 @@ from tabulate import tabulate as tb
 from datetime import datetime as dt
 
 import protopy.settings as sts
+from protopy.helpers.filters import filters
+from protopy.helpers.walker import find_file, walk
 
 def _speak_message(message: str, *args, **kwargs):
     """Uses pyttsx3 to speak a given message."""
@@ -75,7 +77,7 @@ def group_text(text, charLen, *args, **kwargs):
 
 def collect_ignored_dirs(source, ignore_dirs, *args, **kwargs):
     """
-    Uses os.walk and regular expressions to collect directories to be ignored.
+    Uses helpers/walker.py and regular expressions to collect directories to be ignored.
 
     Args:
         source (str): The root directory to start searching from.
@@ -85,13 +87,11 @@ def collect_ignored_dirs(source, ignore_dirs, *args, **kwargs):
         set: A set of directories to be ignored.
     """
     ignored = set()
-    regexs = [re.compile(d) for d in ignore_dirs]
-
-    for root, dirs, _ in os.walk(source, topdown=True):
-        for dir in dirs:
-            dir_path = os.path.join(root, dir).replace(os.sep, '/')
-            if any(regex.search(dir_path) for regex in regexs):
-                ignored.add(os.path.normpath(dir_path))
+    matches = filters(archive_dirs=ignore_dirs).matcher('archive')
+    for d in walk(source):
+        for entry in d.dirs:
+            if matches(entry.path):
+                ignored.add(os.path.normpath(entry.path))
     return ignored
 
 @contextmanager
@@ -127,21 +127,9 @@ def _find_file_path(raw_path=None, *args, project_dir=None, max_depth=5, verbose
     if not raw_path:
         return None
     pr_dir = project_dir or sts.project_dir
-    root_depth = pr_dir.count(os.sep)
     file_name = os.path.basename(raw_path)
-    def ignored(d):
-        d = d.strip()
-        return any(d == i or d.endswith(i.strip('*')) for i in sts.ignore_dirs)
-    for root, dirs, files in os.walk(pr_dir, topdown=True):
-        if ignored(os.path.basename(root)):
-            dirs.clear()
-            continue
-        if root.count(os.sep) - root_depth >= max_depth:
-            dirs.clear()
-            continue
-        if file_name in files:
-            if verbose:
-                print(f"\ncontracts._find_file_path: Found {file_name = } at {root = }")
-            return os.path.join(root, file_name)
-        dirs[:] = [d for d in dirs if not ignored(d)]
-    return None
+    ignored = filters().matcher('dir')
+    path = find_file(pr_dir, file_name, max_depth=max_depth, prune=lambda name, *_: ignored(name))
+    if path and verbose:
+        print(f"\ncontracts._find_file_path: Found {file_name = } at root = {os.path.dirname(path)!r}")
+    return path
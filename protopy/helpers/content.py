@@ -0,0 +1,124 @@
+# content.py
+"""
+WHY: Decide text vs binary without decoding whole files.
+- known extensions are decided by table, unknown ones by sniffing the first block
+- ContentIndex caches decisions per source tree keyed by path + size + mtime
+Binary files must only ever be copied, never decoded and re-encoded.
+"""
+
+import hashlib, json, os, threading
+from typing import Dict, List
+
+import protopy.settings as sts
+
+sniff_size = 8192
+
+text_exts = {
+    ".py", ".pyw", ".pyi", ".md", ".rst", ".txt", ".yml", ".yaml", ".json", ".toml",
+    ".cfg", ".ini", ".in", ".lock", ".csv", ".html", ".css", ".js", ".ts", ".sh",
+    ".bat", ".ps1", ".xml", ".env", ".gitignore", ".gitattributes", ".log",
+}
+binary_exts = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff", ".ico", ".webp", ".pdf",
+    ".whl", ".zip", ".gz", ".tgz", ".tar", ".xz", ".bz2", ".7z", ".rar", ".egg",
+    ".exe", ".dll", ".so", ".pyd", ".pyc", ".pyo", ".o", ".a", ".lib", ".bin",
+    ".db", ".sqlite", ".sqlite3", ".pkl", ".pickle", ".npy", ".npz", ".parquet",
+    ".mp3", ".wav", ".ogg", ".mp4", ".avi", ".mov", ".woff", ".woff2", ".ttf", ".otf",
+}
+# control bytes other than \t \n \f \r and ESC hint at binary content
+_ctrl = bytes(set(range(32)) - {9, 10, 12, 13, 27})
+
+
+def sniff(block: bytes, *args, **kwargs) -> bool:
+    """
+    WHY: True if block looks binary: NUL bytes, invalid utf-8 or many control bytes.
+    """
+    if not block:
+        return False
+    if b"\x00" in block:
+        return True
+    try:
+        block.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # a multi byte char cut off at the block end is still text
+        if e.start < len(block) - 3:
+            return True
+    return len(block.translate(None, _ctrl)) < len(block) * 0.95
+
+
+def ext_kind(path: str, *args, **kwargs) -> bool | None:
+    """
+    WHY: Table lookup, None if the extension alone does not decide.
+    """
+    name = os.path.basename(path).casefold()
+    ext = os.path.splitext(name)[1] or name
+    if ext in binary_exts:
+        return True
+    if ext in text_exts:
+        return False
+    return None
+
+
+def is_binary(path: str, *args, **kwargs) -> bool:
+    kind = ext_kind(path)
+    if kind is not None:
+        return kind
+    with open(path, "rb") as f:
+        return sniff(f.read(sniff_size))
+
+
+class ContentIndex:
+    """
+    WHY: Per source tree cache of text/binary decisions, stored in sts.resources_dir.
+    Entries are reused while a file keeps its size and mtime.
+    """
+
+    def __init__(self, src_dir: str, *args, **kwargs):
+        self.src_dir = os.path.abspath(src_dir)
+        key = hashlib.md5(self.src_dir.encode("utf-8")).hexdigest()[:12]
+        self.path = os.path.join(
+            sts.resources_dir, "content_index",
+            f"{os.path.basename(self.src_dir) or 'root'}-{key}.json",
+        )
+        self.entries: Dict[str, List] = self._load()
+        self.seen: set = set()
+        self.dirty = False
+
+    def _load(self, *args, **kwargs) -> Dict[str, List]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_binary(self, path: str, *args, st: os.stat_result = None, **kwargs) -> bool:
+        st = st or os.stat(path)
+        rel = os.path.relpath(path, self.src_dir)
+        self.seen.add(rel)
+        hit = self.entries.get(rel)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        kind = is_binary(path)
+        self.entries[rel] = [st.st_size, st.st_mtime_ns, kind]
+        self.dirty = True
+        return kind
+
+    def prune(self, *args, **kwargs) -> None:
+        """
+        WHY: Drop entries of files that were not looked up during this run.
+        """
+        stale = self.entries.keys() - self.seen
+        for rel in stale:
+            del self.entries[rel]
+        self.dirty |= bool(stale)
+
+    def save(self, *args, **kwargs) -> None:
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # one tmp file per thread, concurrent saves of the same index do not collide
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,117 @@
+# filters.py
+"""
+WHY: One compiled filter engine for every ignore/abbreviate decision.
+- 'dir':     sts.ignore_dirs on a dir name (exact, '*suffix' or glob like '*.egg-info')
+- 'abbrev':  sts.abrev_dirs on a dir name (listing is cut after the first file)
+- 'file':    sts.ignore_files on a file name, patterns are case-insensitive substrings
+             hidden while verbose < their level
+- 'archive': creator/params.yml ignore_dirs regexes, searched on the '/' separated path
+Patterns are compiled once into one set, one str.endswith tuple or one regex per
+kind, filters() caches the compiled engine per verbosity and pattern set, so the
+per entry cost no longer grows with the number of patterns.
+"""
+
+import fnmatch, os, re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Tuple
+
+import protopy.settings as sts
+
+kinds = ("dir", "abbrev", "file", "archive")
+_glob_chars = ("*", "?", "[")
+
+
+def _leaf(path: str) -> str:
+    return os.path.basename(path.rstrip("/\\"))
+
+
+def _dir_matcher(patterns: Tuple[str, ...]) -> Callable[[str], bool]:
+    """
+    WHY: exact and '*suffix' patterns are one endswith call, globs one regex.
+    """
+    suffixes = tuple(p.lstrip("*") for p in patterns)
+    globs = [fnmatch.translate(p) for p in patterns if any(c in p for c in _glob_chars)]
+    # fnmatch is case-insensitive where the file system is (os.path.normcase)
+    rx = re.compile("|".join(globs), re.I if os.name == "nt" else 0) if globs else None
+    if rx is None:
+        return lambda name: name.endswith(suffixes)
+    return lambda name: name.endswith(suffixes) or rx.match(name) is not None
+
+
+def _file_matcher(rules: Tuple[Tuple[int, Tuple[str, ...]], ...], verbose: int
+                                                                ) -> Callable[[str], bool]:
+    hidden = sorted({p.casefold() for level, pats in rules if verbose < level for p in pats})
+    if not hidden:
+        return lambda name: False
+    rx = re.compile("|".join(re.escape(p) for p in hidden))
+    return lambda name: rx.search(name.casefold()) is not None
+
+
+def _regex_matcher(patterns: Tuple[str, ...]) -> Callable[[str], bool]:
+    if not patterns:
+        return lambda path: False
+    rx = re.compile("|".join(f"(?:{p})" for p in patterns))
+    return lambda path: rx.search(path.replace(os.sep, "/")) is not None
+
+
+class Filters:
+    """
+    WHY: Compiled matchers of one pattern set, use filters() to get a cached one.
+    """
+
+    def __init__(self, *args, verbose: int = 0, ignore_dirs: Tuple[str, ...] = (),
+        abrev_dirs: Tuple[str, ...] = (), ignore_files: tuple = (),
+        archive_dirs: Tuple[str, ...] = (), **kwargs):
+        abrev = frozenset(abrev_dirs)
+        self.verbose = verbose
+        self.matchers: Dict[str, Callable[[str], bool]] = {
+            "dir": _dir_matcher(ignore_dirs),
+            "abbrev": lambda name: name in abrev,
+            "file": _file_matcher(ignore_files, verbose),
+            "archive": _regex_matcher(archive_dirs),
+        }
+
+    def match(self, path: str, kind: str, *args, **kwargs) -> bool:
+        """
+        WHY: True if path is ignored (abbreviated for kind='abbrev').
+        Name kinds use the last path component, 'archive' the whole path.
+        """
+        if kind == "archive":
+            return self.matchers[kind](path)
+        return self.matchers[kind](_leaf(path))
+
+    def matcher(self, kind: str, *args, **kwargs) -> Callable[[str], bool]:
+        """
+        WHY: The bare matcher for hot loops that already hold entry names (no path split).
+        """
+        return self.matchers[kind]
+
+
+@lru_cache(maxsize=32)
+def _compiled(verbose: int, ignore_dirs: tuple, abrev_dirs: tuple, ignore_files: tuple,
+                                                            archive_dirs: tuple) -> Filters:
+    return Filters(verbose=verbose, ignore_dirs=ignore_dirs, abrev_dirs=abrev_dirs,
+                   ignore_files=ignore_files, archive_dirs=archive_dirs)
+
+
+def filters(verbose: int = 0, *args, ignore_dirs: Iterable[str] = None,
+    abrev_dirs: Iterable[str] = None, ignore_files: Dict[int, Iterable[str]] = None,
+    archive_dirs: Iterable[str] = None, **kwargs) -> Filters:
+    """
+    WHY: Cached Filters, None means the sts.* default (archive_dirs defaults to none).
+    """
+    ignore_files = getattr(sts, "ignore_files", {}) if ignore_files is None else ignore_files
+    return _compiled(
+        int(verbose or 0),
+        tuple(sorted(getattr(sts, "ignore_dirs", ()) if ignore_dirs is None else ignore_dirs)),
+        tuple(sorted(getattr(sts, "abrev_dirs", ()) if abrev_dirs is None else abrev_dirs)),
+        tuple(sorted((lvl, tuple(sorted(pats))) for lvl, pats in ignore_files.items())),
+        tuple(archive_dirs or ()),
+    )
+
+
+def match(path: str, kind: str, *args, verbose: int = 0, **kwargs) -> bool:
+    """
+    WHY: Module level shortcut for the sts.* defaults.
+    """
+    return filters(verbose, **kwargs).match(path, kind)
@@ -3,6 +3,7 @@ import os
 import graphviz
 import argparse
 import protopy.settings as sts
+from protopy.helpers.walker import find_file
 from colorama import Fore, Style
 
 
@@ -23,11 +24,11 @@ class PackageInfo:
         """
         Determine the root directory of a Python project by locating __main__.py.
         """
-        for root, dirs, files in os.walk(os.getcwd()):
-            dirs[:] = [d for d in dirs if d not in sts.ignore_dirs]
-            if '__main__.py' in files:
-                return os.path.split(root)
-        return None
+        # exact dir names, unlike Tree no globs apply here
+        ignored = set(sts.ignore_dirs)
+        path = find_file(os.getcwd(), '__main__.py',
+                            prune=lambda name, path, depth: depth > 0 and name in ignored)
+        return os.path.split(os.path.dirname(path)) if path else None
 
     def build_graph(self, filepath):
         filename = os.path.basename(filepath)
@@ -121,10 +122,7 @@ class PackageInfo:
         """
         Recursively locate a specific file within a given directory.
         """
-        for root, dirs, files in os.walk(search_dir):
-            if filename in files:
-                return os.path.join(root, filename)
-        return None
+        return find_file(search_dir, filename)
 
 def set_params(*args, **kwargs):
     parser = argparse.ArgumentParser(description="Analyze Python package structure and visualize import relationships.")
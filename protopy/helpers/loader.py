@@ -0,0 +1,201 @@
+# loader.py
+"""
+WHY: Parallel, bounded file content loading for Tree dumps.
+- files are read ahead on a thread pool in walk order, the output order does not change
+- a path is read once per Tree run, the dump and load_matched_files share the read
+- file_limit: larger files keep their head and tail bytes, the middle is cut out
+- budget: all dumped contents together stop at budget chars, later files are omitted
+- large files are mmap'ed, only the first/last lines (or head/tail bytes) are touched
+- binary files (helpers/content.py) show size metadata instead of content
+"""
+
+import mmap, os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Tuple
+
+from protopy.helpers.content import ext_kind, sniff, sniff_size
+from protopy.helpers.workers import normalize_jobs
+
+# (head bytes, tail bytes, file size, binary), tail is empty unless the file was cut
+Read = Tuple[bytes, bytes, int, bool]
+
+
+def head_end(m: mmap.mmap, lines: int, limit: int, *args, **kwargs) -> int:
+    """
+    WHY: End offset of the first lines in m, at most limit bytes.
+    """
+    pos = 0
+    for _ in range(lines):
+        nl = m.find(b"\n", pos, limit)
+        if nl < 0:
+            return limit
+        pos = nl + 1
+    return pos
+
+
+def tail_start(m: mmap.mmap, lines: int, limit: int, *args, **kwargs) -> int:
+    """
+    WHY: Start offset of the last lines in m, at most limit bytes before the end.
+    """
+    size = len(m)
+    lo = max(0, size - limit)
+    # a final newline ends the last line, it does not start an empty one
+    pos = size - 1 if m[size - 1:size] == b"\n" else size
+    for _ in range(lines):
+        nl = m.rfind(b"\n", lo, pos)
+        if nl < 0:
+            return lo
+        pos = nl
+    return pos + 1
+
+
+def size_text(size: int, *args, **kwargs) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def decode(data: bytes, *args, errors: str = "ignore", **kwargs) -> str:
+    """
+    WHY: utf-8 with universal newlines, like open(path, "r") would read it.
+    """
+    return data.decode("utf-8", errors).replace("\r\n", "\n").replace("\r", "\n")
+
+
+class ContentLoader:
+    """
+    WHY: One loader per Tree run, reads files ahead and hands them out in order.
+    """
+
+    def __init__(self, *args, jobs: int = None, budget: int = None, file_limit: int = None,
+                                    lines: int = None, ahead: int = None, **kwargs):
+        # reading is I/O bound, default to more threads than cpus
+        self.jobs = normalize_jobs(jobs) if jobs else min(32, (os.cpu_count() or 1) * 4)
+        self.budget, self.file_limit, self.lines = budget, file_limit, lines
+        self.ahead = ahead or self.jobs * 2
+        self.used = 0
+        self.keep: set = set()
+        self._reads: Dict[str, Future] = {}
+        self._ex = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.budget is not None and self.used >= self.budget
+
+    def read(self, path: str, *args, whole: bool = False, **kwargs) -> Read:
+        """
+        WHY: Whole file up to file_limit bytes. Above that the file is mmap'ed and only
+        its first and last lines (or head and tail halves) are read. Binary files are
+        recognized by extension or their first block and not read any further.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if whole:
+                return f.read(), b"", size, False
+            if ext_kind(path):
+                return b"", b"", size, True
+            if self.file_limit is None or size <= self.file_limit:
+                data = f.read()
+                return data, b"", size, sniff(data[:sniff_size])
+            if sniff(f.read(sniff_size)):
+                return b"", b"", size, True
+            half = self.file_limit // 2
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                if self.lines:
+                    return (m[:head_end(m, self.lines, half)],
+                            m[tail_start(m, self.lines, half):], size, False)
+                return m[:half], m[size - half:], size, False
+
+    def submit(self, path: str, *args, **kwargs) -> Future:
+        """
+        WHY: Start reading path in the background, a path is only ever read once.
+        """
+        fut = self._reads.get(path)
+        if fut is None:
+            if self._ex is None:
+                self._ex = ThreadPoolExecutor(max_workers=self.jobs)
+            fut = self._reads[path] = self._ex.submit(self.read, path)
+        return fut
+
+    def get(self, path: str, *args, whole: bool = False, **kwargs) -> Read:
+        """
+        WHY: The (prefetched) read of path, released unless path is in keep.
+        whole=True re-reads files that were cut by file_limit or not read (binary).
+        """
+        fut = self._reads.get(path) if path in self.keep else self._reads.pop(path, None)
+        read = fut.result() if fut is not None else self.read(path)
+        head, tail, size, _ = read
+        if whole and (tail or len(head) < size):
+            return self.read(path, whole=True)
+        return read
+
+    def text(self, read: Read, *args, **kwargs) -> str:
+        """
+        WHY: Decoded text of a read. Cut files show what was cut and an estimated
+        line count (from the bytes that were read), binary files their size only.
+        """
+        head, tail, size, binary = read
+        if binary:
+            return f"[binary file, {size_text(size)}]\n"
+        if not tail:
+            return decode(head)
+        cut = size - len(head) - len(tail)
+        sample = len(head) + len(tail)
+        lines = round(size * (head.count(b"\n") + tail.count(b"\n")) / sample) if sample else 0
+        return (f"{decode(head)}\n... [{size_text(cut)} of {size_text(size)} truncated, "
+                f"~{lines} lines in total] ...\n{decode(tail)}")
+
+    def clip(self, text: str, *args, **kwargs) -> str:
+        """
+        WHY: Charges text against the global budget, cuts its middle if it does not fit.
+        """
+        if self.budget is None:
+            return text
+        left = self.budget - self.used
+        if left <= 0:
+            return "[content budget exhausted]\n"
+        if len(text) > left:
+            half = left // 2
+            text = (f"{text[:half]}\n... [{len(text) - left} chars over budget] ...\n"
+                    f"{text[len(text) - (left - half):]}")
+        self.used += min(len(text), left)
+        return text
+
+    def load(self, path: str, *args, **kwargs) -> str:
+        """
+        WHY: Budgeted text of path for a dump, nothing is read once the budget is spent.
+        """
+        if self.exhausted:
+            if path not in self.keep:
+                self._reads.pop(path, None)
+            return self.clip("")
+        return self.clip(self.text(self.get(path)))
+
+    def prefetch(self, events: Iterable[tuple], *args, **kwargs) -> Iterator[tuple]:
+        """
+        WHY: Passes events through in order, ('file', path, ...) events start their
+        read as soon as they enter the window of ahead files, so the reads of upcoming
+        files overlap with the output of the current one.
+        """
+        window, files = deque(), 0
+        for event in events:
+            if event[0] == "file":
+                if not self.exhausted:
+                    self.submit(event[1])
+                files += 1
+            window.append(event)
+            # non file events at the front leave at once, the walk output is not delayed
+            while window and (window[0][0] != "file" or files > self.ahead):
+                out = window.popleft()
+                files -= out[0] == "file"
+                yield out
+        yield from window
+
+    def close(self, *args, **kwargs) -> None:
+        self._reads.clear()
+        self.keep.clear()
+        if self._ex is not None:
+            self._ex.shutdown(wait=False, cancel_futures=True)
+            self._ex = None
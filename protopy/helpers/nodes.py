@@ -0,0 +1,154 @@
+# nodes.py
+"""
+WHY: Structured project tree for consumers that need more than rendered text.
+- TreeNode holds name, kind ('dir'/'file'), size, mtime and children
+- children of a dir are listed on first access only, untouched subtrees cost nothing
+- the same rules as Tree apply: ignored and too deep dirs are 'pruned' (not listed),
+  abbreviated dirs keep their first file and are 'cut', symlinked dirs are not entered
+- to_dict()/to_json() serialize (sub)trees, Tree.render_nodes() gives the ASCII tree
+"""
+
+import json, os
+from typing import Dict, Iterator, List, Optional
+
+from protopy.helpers.filters import Filters, filters
+from protopy.helpers.walker import _enters, scan_dir
+
+
+class _Scope:
+    """
+    Rules shared by all nodes of one tree.
+    """
+
+    __slots__ = ("ignored", "abbrev", "max_depth")
+
+    def __init__(self, flt: Filters, max_depth: int = None, *args, **kwargs):
+        self.ignored, self.abbrev = flt.matcher("dir"), flt.matcher("abbrev")
+        self.max_depth = max_depth
+
+
+def _stat(entry, *args, **kwargs) -> tuple:
+    try:
+        st = entry.stat()
+    except OSError:
+        return None, None
+    return st.st_size, st.st_mtime
+
+
+class TreeNode:
+    """
+    One file or directory. size is None for dirs, mtime is in seconds (os.stat).
+    """
+
+    __slots__ = ("name", "kind", "size", "mtime", "path", "depth", "pruned", "cut",
+                                                                    "_children", "_scope")
+
+    def __init__(self, name: str, kind: str, path: str, depth: int = 0, *args,
+        size: int = None, mtime: float = None, pruned: bool = False, scope: _Scope = None,
+        **kwargs):
+        self.name, self.kind, self.path, self.depth = name, kind, path, depth
+        self.size, self.mtime = size, mtime
+        self.pruned, self.cut = pruned, False
+        # files have no children, dirs list theirs on first access
+        self._children: Optional[List["TreeNode"]] = None if kind == "dir" else []
+        self._scope = scope
+
+    def __repr__(self) -> str:
+        return f"TreeNode({self.name!r}, {self.kind!r}, depth={self.depth})"
+
+    @property
+    def loaded(self) -> bool:
+        return self._children is not None
+
+    @property
+    def children(self) -> List["TreeNode"]:
+        """
+        WHY: Files first, then dirs, each in listing order (the order Tree renders).
+        """
+        if self._children is None:
+            self._children = [] if self.pruned else self._list()
+        return self._children
+
+    def _list(self, *args, **kwargs) -> List["TreeNode"]:
+        scope, depth = self._scope, self.depth + 1
+        try:
+            dirs, files = scan_dir(self.path)
+        except OSError:
+            # unreadable dirs are shown like pruned ones
+            self.pruned = True
+            return []
+        if scope.abbrev(self.name) and len(files) > 1:
+            files, self.cut = files[:1], True
+        out = []
+        for e in files:
+            size, mtime = _stat(e)
+            out.append(TreeNode(e.name, "file", e.path, depth, size=size, mtime=mtime,
+                                                                            scope=scope))
+        for e in dirs:
+            if not _enters(e):
+                continue
+            pruned = ((scope.max_depth is not None and depth >= scope.max_depth)
+                      or scope.ignored(e.name))
+            out.append(TreeNode(e.name, "dir", e.path, depth, mtime=_stat(e)[1],
+                                                            pruned=pruned, scope=scope))
+        return out
+
+    def __iter__(self) -> Iterator["TreeNode"]:
+        return iter(self.children)
+
+    def get(self, rel: str, *args, **kwargs) -> Optional["TreeNode"]:
+        """
+        WHY: The node at rel ('/' or os.sep separated) below this one, only the dirs
+        on the way are listed.
+        """
+        node = self
+        for part in rel.replace(os.sep, "/").strip("/").split("/"):
+            if not part:
+                continue
+            node = next((c for c in node.children if c.name == part), None)
+            if node is None:
+                return None
+        return node
+
+    def iter_nodes(self, *args, **kwargs) -> Iterator["TreeNode"]:
+        """
+        WHY: This node and all nodes below it, pre-order, lists every dir it reaches.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def to_dict(self, *args, depth: int = None, **kwargs) -> Dict[str, object]:
+        """
+        WHY: JSON-ready dict, depth limits how many levels of children are listed,
+        dirs below that limit have no 'children' key.
+        """
+        out = {"name": self.name, "kind": self.kind, "size": self.size, "mtime": self.mtime}
+        if self.kind != "dir":
+            return out
+        if depth is None or depth > 0:
+            sub = None if depth is None else depth - 1
+            out["children"] = [c.to_dict(depth=sub) for c in self.children]
+        if self.pruned:
+            out["pruned"] = True
+        if self.cut:
+            out["cut"] = True
+        return out
+
+    def to_json(self, *args, depth: int = None, indent: int = None, **kwargs) -> str:
+        return json.dumps(self.to_dict(depth=depth), ensure_ascii=False, indent=indent)
+
+
+def mk_root(top: str, *args, max_depth: int = None, flt: Filters = None,
+                                                                **kwargs) -> TreeNode:
+    """
+    WHY: Root node of top (depth 0), nothing below it is listed yet.
+    flt defaults to the sts.* filters (helpers/filters.py).
+    """
+    scope = _Scope(flt or filters(), max_depth)
+    name = os.path.basename(top)
+    st = os.stat(top)
+    pruned = (max_depth is not None and max_depth <= 0) or scope.ignored(name)
+    return TreeNode(name, "dir", top, 0, mtime=st.st_mtime, pruned=pruned, scope=scope)
@@ -0,0 +1,91 @@
+# replacer.py
+"""
+WHY: Compile many old -> new text replacements into one regex alternation, so a
+text is rewritten in a single linear scan instead of one str.replace per pair.
+- case variants (Capitalized, UPPER) are derived like the clone rules do
+- longest match wins at every position (protolib before protopy before proto)
+- replaced text is never re-scanned, so replacements cannot chain
+Use compile_replacer(text_repls) to share one compiled Replacer between callers.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+class Replacer:
+
+    def __init__(self, text_repls: Dict[str, str], *args, case_variants: bool = True,
+        **kwargs):
+        """
+        WHY: Build the variant table once and compile it into a single matcher.
+        """
+        self.table = self.mk_table(text_repls, *args, case_variants=case_variants, **kwargs)
+        # longest first, so the alternation always prefers the longest token
+        olds = sorted(self.table, key=len, reverse=True)
+        self.regex = re.compile("|".join(map(re.escape, olds))) if olds else None
+
+    @staticmethod
+    def mk_table(text_repls: Dict[str, str], *args, case_variants: bool = True,
+        **kwargs) -> Dict[str, str]:
+        """
+        WHY: Expand old -> new pairs into direct, capitalized and uppercase pairs.
+        Earlier pairs take precedence over derived variants of later ones.
+        """
+        table: Dict[str, str] = {}
+        for old, new in text_repls.items():
+            if not old or new is None:
+                continue
+            table.setdefault(old, new)
+            if not case_variants:
+                continue
+            if old.islower():
+                table.setdefault(old.capitalize(), new.capitalize())
+            table.setdefault(old.upper(), new.upper())
+        return table
+
+    def spans(self, text: str, *args, **kwargs) -> List[Tuple[int, int, str]]:
+        """
+        WHY: Token offsets (start, end, old) for callers that splice text themselves.
+        """
+        if self.regex is None:
+            return []
+        return [(m.start(), m.end(), m.group()) for m in self.regex.finditer(text)]
+
+    def splice(self, text: str, spans: List[Tuple[int, int, str]], *args, **kwargs) -> str:
+        """
+        WHY: Apply precomputed spans without searching the text again.
+        """
+        if not spans:
+            return text
+        parts, pos = [], 0
+        for start, end, old in spans:
+            parts.append(text[pos:start])
+            parts.append(self.table[old])
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+    def subn(self, text: str, *args, **kwargs) -> Tuple[str, int]:
+        if self.regex is None:
+            return text, 0
+        return self.regex.subn(lambda m: self.table[m.group()], text)
+
+    def sub(self, text: str, *args, **kwargs) -> str:
+        return self.subn(text, *args, **kwargs)[0]
+
+    __call__ = sub
+
+
+@lru_cache(maxsize=32)
+def _compile(items: Tuple[Tuple[str, str], ...], case_variants: bool) -> Replacer:
+    return Replacer(dict(items), case_variants=case_variants)
+
+
+def compile_replacer(text_repls: Dict[str, str], *args, case_variants: bool = True,
+    **kwargs) -> Replacer:
+    """
+    WHY: Compiled Replacers are cached by their replacement pairs, so every
+    substitution path using the same pairs shares one matcher.
+    """
+    return _compile(tuple(text_repls.items()), case_variants)
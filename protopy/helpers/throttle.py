@@ -0,0 +1,34 @@
+# throttle.py
+"""
+WHY: Cap the I/O rate of background work (archive copies) with a token bucket.
+- tokens are bytes, refilled at rate bytes/second up to burst
+- consume(n) blocks until n bytes may pass, shared by all worker threads
+"""
+
+import threading, time
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, *args, burst: float = None, **kwargs):
+        self.rate = float(rate)
+        # one second worth of bytes by default, so short bursts are not penalized
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, n: int, *args, **kwargs) -> float:
+        """
+        WHY: Take n tokens, sleeping while the bucket is in debt. Returns the time slept.
+        Requests larger than burst are allowed and simply drive the bucket negative.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
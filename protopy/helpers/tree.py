@@ -3,14 +3,22 @@
 WHY: Minimal, consistent tree builder that honors sts.* settings:
 - ignore_dirs (with globs), abrev_dirs, ignore_files (verbosity thresholds).
 - Collects matched files and (optionally) dumps contents by verbosity.
-- Colorization is optional and isolated.
+- Colorization is optional and applied while lines are built.
+- iter_tree()/iter_contents() stream lines and content chunks while the walk runs.
+- Contents are read ahead in parallel and bounded in size (helpers/loader.py).
+- mk_nodes() gives the tree as lazy TreeNode objects (helpers/nodes.py), render_nodes()
+  renders them like mk_tree, apis/tree.py serves them as JSON.
 """
 
-import contextlib, fnmatch, os, re
+import contextlib, os, re
 from colorama import Fore, Style
-from typing import Set, List, Tuple, Dict, Iterable, Optional
+from typing import Set, List, Tuple, Dict, Iterable, Iterator, Optional
 
 from protopy.helpers.collections import temp_chdir as _temp_chdir
+from protopy.helpers.filters import filters
+from protopy.helpers.loader import ContentLoader, decode
+from protopy.helpers.nodes import TreeNode, mk_root
+from protopy.helpers.walker import ListingCache, walk
 import protopy.settings as sts
 
 styles_dict: Dict[str, Dict[str, Dict[str, object]]] = {
@@ -40,7 +48,8 @@ class Tree:
         self.matched_files: List[str] = []
         self.loaded_files: List[str] = []
         self.verbose = self.handle_verbosity(*args, **kwargs)
-        self._out: Optional[List[str]] = None
+        self._filters = filters(self.verbose)
+        self._loader: Optional[ContentLoader] = None
 
     def __call__(self, *args, **kwargs) -> dict:
         """
@@ -81,64 +90,213 @@ class Tree:
         for name, style_map in st.items():
             for k, v in style_map.items():
                 setattr(self, f"{name}_{k}", v)
+        # every symbol plain and colored once, lines are built from these directly
+        syms = {name: m["sym"] for name, m in st.items() if name != "ext"}
+        self._syms = {
+            False: syms,
+            True: {name: f"{st[name]['col']}{sym}{Style.RESET_ALL}" for name, sym in syms.items()},
+        }
+        ext = st.get("ext") or {"sym": [], "col": []}
+        self._ext_cols = dict(zip(ext["sym"], ext["col"]))
+        self._ext_rx = (re.compile(f"(?:{'|'.join(map(re.escape, self._ext_cols))})$")
+                        if self._ext_cols else None)
+
+    def _paint_name(self, name: str, *args, **kwargs) -> str:
+        """
+        WHY: Colors a file name by its extension, one regex for all styled extensions.
+        """
+        m = self._ext_rx.search(name) if self._ext_rx is not None else None
+        return f"{self._ext_cols[m.group(0)]}{name}{Style.RESET_ALL}" if m else name
 
         # --- public API ---------------------------------------------------------
 
-    def mk_tree(self, *args, project_dir:str=None, max_depth:int=6, ignores:set=None,
-        colorized: bool = False, **kwargs) -> tuple[str, str]:
+    def mk_tree(self, *args, colorized: bool = False, **kwargs) -> tuple[str, str]:
         """
         WHY: Walk project_dir; print dir first, then dir-disc if truncated/ignored.
+        Both texts are built from one walk, use iter_tree/iter_contents to stream.
+        """
+        tree, contents = [], []
+        for kind, text in self._iter_walk(*args, colorized=colorized, **kwargs):
+            (tree if kind == "tree" else contents).append(text)
+        out = "\n".join(tree)
+        return out.strip() if colorized else out, "".join(contents)
+
+    def iter_tree(self, *args, colorized: bool = False, **kwargs) -> Iterator[str]:
+        """
+        WHY: Hierarchy lines as the walk proceeds, "\n".join() them for mk_tree's tree.
+        """
+        for _, line in self._iter_walk(*args, kinds=("tree",), colorized=colorized, **kwargs):
+            yield line
+
+    def iter_contents(self, *args, **kwargs) -> Iterator[str]:
+        """
+        WHY: File contents in chunks as the walk proceeds, memory stays constant.
+        "".join() them for mk_tree's contents.
+        """
+        for _, chunk in self._iter_walk(*args, kinds=("contents",), **kwargs):
+            yield chunk
+
+    def iter_text(self, *args, contents: bool = True, colorized: bool = False,
+                                                            **kwargs) -> Iterator[str]:
+        """
+        WHY: Hierarchy lines as the walk proceeds, then (with contents) the file
+        contents, both from one walk. Contents are held until the hierarchy is done,
+        at most the content budget (see _iter_walk).
+        """
+        kinds, held = ("tree", "contents") if contents else ("tree",), []
+        first = True
+        for kind, text in self._iter_walk(*args, kinds=kinds, colorized=colorized, **kwargs):
+            if kind != "tree":
+                held.append(text)
+                continue
+            yield text if first else f"\n{text}"
+            first = False
+        if held:
+            yield "\n"
+            yield from held
+
+    def mk_nodes(self, *args, project_dir: str = None, max_depth: int = 6,
+                                        ignores: set = None, **kwargs) -> TreeNode:
+        """
+        WHY: The project tree as TreeNode objects, same rules as mk_tree.
+        Children are listed on first access, query subtrees via TreeNode.get(rel).
+        """
+        prj = self._project_dir(*args, project_dir=project_dir)
+        self._filters = filters(self.verbose, ignore_dirs=ignores or None)
+        return mk_root(prj, max_depth=max_depth, flt=self._filters)
+
+    def iter_nodes(self, node: TreeNode, *args, colorized: bool = False,
+                                                        **kwargs) -> Iterator[str]:
+        """
+        WHY: Hierarchy lines of node and everything below it, like iter_tree.
+        """
+        sym = self._syms[bool(colorized)]
+        dir_fold, disc = f"{sym['dir']}{sym['fold']}", f"{self.indent}{sym['dir_disc']}"
+        yield "## Hierarchy"
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            ind = self.indent * (n.depth - node.depth)
+            yield f"{ind}{dir_fold} {n.name}"
+            if n.pruned:
+                yield f"{ind}{disc}"
+                continue
+            prefix, dirs = f"{ind}{self.indent}{sym['file']} ", []
+            for c in n.children:
+                if c.kind == "dir":
+                    dirs.append(c)
+                else:
+                    yield f"{prefix}{self._paint_name(c.name) if colorized else c.name}"
+            if n.cut:
+                yield f"{ind}{disc}"
+            stack.extend(reversed(dirs))
+        yield "\n"
+
+    def render_nodes(self, node: TreeNode, *args, colorized: bool = False, **kwargs) -> str:
+        """
+        WHY: The ASCII tree of node, for the project root equal to mk_tree's tree.
+        """
+        out = "\n".join(self.iter_nodes(node, colorized=colorized))
+        return out.strip() if colorized else out
+
+    def _iter_walk(self, *args, jobs: int = None, budget: int = None, file_limit: int = None,
+                                    lines: int = None, **kwargs) -> Iterator[Tuple[str, str]]:
+        """
+        WHY: The one walk behind all renderings, yields ('tree', line) and
+        ('contents', chunk) events. File contents are read ahead on a thread pool
+        (helpers/loader.py), bounded by budget chars in total and file_limit bytes
+        per file, larger files show their first/last lines only (defaults:
+        sts.tree_content_budget, sts.tree_file_limit, sts.tree_file_lines).
+        """
+        if self._loader is not None:
+            self._loader.close()
+        self._loader = ContentLoader(
+            jobs=jobs,
+            budget=getattr(sts, "tree_content_budget", None) if budget is None else budget,
+            file_limit=getattr(sts, "tree_file_limit", None) if file_limit is None else file_limit,
+            lines=getattr(sts, "tree_file_lines", None) if lines is None else lines,
+        )
+        for event in self._loader.prefetch(self._walk_events(*args, jobs=jobs, **kwargs)):
+            if event[0] != "file":
+                yield event
+                continue
+            _, full, f = event
+            yield "contents", f"\n{Fore.CYAN}\n<file name='{f}' path='{full}'>{Fore.RESET}\n"
+            yield "contents", self.load_file_content(*args, file_path=full, **kwargs)
+
+    def _walk_events(self, *args, project_dir:str=None, max_depth:int=6, ignores:set=None,
+        jobs: int = None, cache: bool = False, kinds: tuple = ("tree", "contents"),
+        colorized: bool = False, **kwargs) -> Iterator[tuple]:
+        """
+        WHY: Walk events, ('file', path, name) marks a file whose content is dumped.
+        Ignored and too deep dirs are never listed (helpers/walker.py), cache=True
+        re-lists only directories whose mtime changed. Lines are colored as they are
+        built, colorized output costs the same as plain output.
         """
         self.matched_files.clear()
         self.loaded_files.clear()
-        prj = (project_dir or (args[0] if args and isinstance(args[0], str) else None)
-               or getattr(sts, "project_dir", os.getcwd()))
-        ign = set(ignores) if ignores else set(getattr(sts, "ignore_dirs", set()))
-        tree, contents = ["## Hierarchy"], ["## File Contents"]
-        self._out = tree
-        base = prj.count(os.sep)
-        for root, dirs, files in os.walk(prj, topdown=True):
-            level = root.count(os.sep) - base
-            sub = os.path.basename(root)
-            ind = self.indent * level
-            tree.append(f"{ind}{self.dir_sym}{self.fold_sym} {sub}")
-            if self._is_ignored(sub, ign) or (max_depth is not None and level >= max_depth):
-                dirs[:] = []
-                tree.append(f"{ind}{self.indent}{self.dir_disc_sym}")
+        prj = self._project_dir(*args, project_dir=project_dir)
+        # compiled once per verbosity and pattern set (helpers/filters.py)
+        self._filters = filters(self.verbose, ignore_dirs=ignores or None)
+        lines = "tree" in kinds
+        if lines:
+            yield "tree", "## Hierarchy"
+        if "contents" in kinds:
+            yield "contents", "## File Contents"
+        ignored = self._filters.matcher("dir")
+        sym = self._syms[bool(colorized)]
+        dir_fold, disc = f"{sym['dir']}{sym['fold']}", f"{self.indent}{sym['dir_disc']}"
+        listings = ListingCache(prj) if cache else None
+        for d in walk(prj, max_depth=max_depth, prune=lambda name, *_: ignored(name),
+                                            yield_pruned=True, jobs=jobs, cache=listings):
+            ind = self.indent * d.depth
+            if lines:
+                yield "tree", f"{ind}{dir_fold} {d.name}"
+            if d.pruned:
+                if lines:
+                    yield "tree", f"{ind}{disc}"
                 continue
-            self._emit_files(root, files, ind, level, contents, *args, **kwargs )
-        tree.append("\n")
-        contents.append("\n")
+            yield from self._emit_files(d.path, [e.name for e in d.files], ind, d.depth,
+                                        *args, kinds=kinds, colorized=colorized, **kwargs)
+        if listings is not None:
+            listings.save()
+        if lines:
+            yield "tree", "\n"
+        if "contents" in kinds:
+            yield "contents", "\n\n"
         self._promote_workfile(*args, **kwargs)
-        out = "\n".join(tree)
-        if colorized:
-            out = self._colorize(out, *args, **kwargs)
-        return out, "\n".join(contents)
 
-    def _emit_files(self, root: str, files: str, ind: str, level: int, contents: list, *args,
-        file_match_regex = None, **kwargs) -> None:
-        log_dir = self._is_abbrev_dir(root, *args, **kwargs)
-        listed = 0
-        for f in files:
+    def _emit_files(self, root: str, files: List[str], ind: str, level: int, *args,
+        kinds: tuple, file_match_regex = None, colorized: bool = False,
+        **kwargs) -> Iterator[Tuple[str, str]]:
+        log_dir = self._filters.match(root, "abbrev")
+        hidden = self._filters.matcher("file")
+        lines, texts = "tree" in kinds, "contents" in kinds
+        sym = self._syms[bool(colorized)]
+        prefix = f"{ind}{self.indent}{sym['file']} "
+        for listed, f in enumerate(files):
             if log_dir and listed >= 1:
-                self._line(f"{ind}{self.indent}{self.dir_disc_sym}", *args, **kwargs)
+                if lines:
+                    yield "tree", f"{ind}{self.indent}{sym['dir_disc']}"
                 break
-            self._line(f"{ind}{self.indent}{self.file_sym} {f}", *args, **kwargs)
-            full = os.path.join(root, f)
+            if lines:
+                yield "tree", f"{prefix}{self._paint_name(f) if colorized else f}"
             if file_match_regex and re.search(file_match_regex, f):
-                self._track_match(*args, path=full, **kwargs)
-            should_load = self.verbose > level and not self._ignored_file(f, *args, **kwargs)
-            if should_load:
-                fc = self.load_file_content(*args, file_path=full, **kwargs)
+                self._track_match(*args, path=os.path.join(root, f), **kwargs)
+            if texts and self.verbose > level and not hidden(f):
+                full = os.path.join(root, f)
                 self.loaded_files.append(full)
-                contents.append(
-                    f"{Fore.CYAN}\n<file name='{f}' path='{full}'>{Fore.RESET}\n{fc}"
-                )
-            listed += 1
+                yield "file", full, f
+
+    def _project_dir(self, *args, project_dir: str = None, **kwargs) -> str:
+        return (project_dir or (args[0] if args and isinstance(args[0], str) else None)
+                or getattr(sts, "project_dir", os.getcwd()))
 
     def _track_match(self, *args, path: str | None = None, **kwargs) -> None:
         if path and path not in self.matched_files:
             self.matched_files.append(path)
+            # load_matched_files reuses the read of the content dump
+            self._loader.keep.add(path)
 
     def _promote_workfile(self, *args, work_file_name:str=None, **kwargs) -> None:
         if not work_file_name:
@@ -164,100 +322,37 @@ class Tree:
         """
         sel: List[dict] = []
         prefixes = tuple(default_ignore_files or ())
-        for p in self.matched_files:
-            if prefixes and p.startswith(prefixes):
-                continue
+        paths = [p for p in self.matched_files if not (prefixes and p.startswith(prefixes))]
+        loader = self._loader or ContentLoader()
+        for p in paths:
+            loader.keep.add(p)
+            loader.submit(p)
+        for p in paths:
             try:
-                with open(p, "r", encoding="utf-8") as fh:
-                    c = fh.read()
+                c = decode(loader.get(p, whole=True)[0], errors="strict")
             except UnicodeDecodeError:
                 print(f"{Fore.RED}Error reading file: {p}{Fore.RESET}")
                 continue
             ext = os.path.splitext(p)[1]
             ftype = self.file_types.get(ext, "Text")
             sel.append({"file_path": p, "file_type": ftype, "file_content": c})
+        loader.close()
+        self._loader = None
         return sel
 
-    # --- helpers: ignore / abbrev / IO -------------------------------------
-
-    def _is_ignored(self, subdir: str, ignores: Set[str], *args, **kwargs) -> bool:
-        """
-        WHY: Support exact matches, suffix-like, and glob patterns.
-        """
-        return any(
-            subdir == pat
-            or subdir.endswith(pat.lstrip("*"))
-            or fnmatch.fnmatch(subdir, pat)
-            for pat in ignores
-        )
-
-    def _match_pat(self, *args, f: str, p: str, **kwargs) -> bool:
-        """Short matcher: exact, substring, or extension token like '.png'."""
-        f2, p2 = f.casefold(), p.casefold()
-        if p2.startswith(".") and "." in f2:
-            return f2.endswith(p2)
-        return p2 == f2 or p2 in f2
-
-    def _ignored_file(self, fname: str, *args, **kwargs) -> bool:
-        """
-        Hide file contents until verbosity reaches the configured min level.
-        Rule: if verbose < level_for_pattern and pattern in name -> ignore.
-        """
-        rules: dict[int, set[str]] = getattr(sts, "ignore_files", {})
-        f = fname.casefold()
-        return any(
-            self.verbose < level and any(p.casefold() in f for p in pats)
-            for level, pats in rules.items()
-        )
-
-
-    def _is_abbrev_dir(self, root: str, *args, **kwargs) -> bool:
-        """
-        WHY: Abbreviate directory listing if leaf name is in sts.abrev_dirs.
-        """
-        sub = os.path.basename(root)
-        abr = set(getattr(sts, "abrev_dirs", set()))
-        return sub in abr
+    # --- helpers: IO -------------------------------------------------------
 
     def load_file_content(self, *args, file_path: str, **kwargs) -> str:
         """
         WHY: Read file as text, suppress noisy errors unless verbose>=1.
+        Inside a walk the read comes from the loader (prefetched, budgeted).
         """
         try:
+            if self._loader is not None:
+                return self._loader.load(file_path)
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
         except Exception as e:
             if self.verbose >= 1:
                 print(f"{Fore.RED}Read error:{Fore.RESET} {e}")
             return ""
-
-    def _line(self, s: str, *args, **kwargs) -> None:
-        """
-        WHY: Append a rendered line to the active tree buffer.
-        """
-        buf = getattr(self, "_out", None)
-        if buf is not None:
-            buf.append(s)
-
-    # --- color / normalize / parse / mk-dirs --------------------------------
-
-    def _colorize(self, tree: str, *args, style: str = "default", **kwargs) -> str:
-        """
-        WHY: Inject ANSI colors based on style symbols and file extensions.
-        """
-        st = styles_dict.get(style, styles_dict["default"])
-        out: List[str] = []
-        for line in tree.split("\n"):
-            for name, m in st.items():
-                sym, col = m.values()
-                if name == "ext":
-                    for sfx, c in zip(sym, col):
-                        line = re.sub(
-                            rf"(\S*{re.escape(sfx)})",
-                            f"{c}\\1{Style.RESET_ALL}",
-                            line,
-                        )
-                else:
-                    line = line.replace(sym, f"{col}{sym}{Style.RESET_ALL}")
-            out.append(line)
-        return "\n".join(out).strip()
@@ -0,0 +1,209 @@
+# walker.py
+"""
+WHY: One directory walker for Tree, archive, verify and file lookups.
+- built on os.scandir, the DirEntry type (and on Windows stat) info comes with the listing
+- depth is tracked per directory, no root.count(os.sep) arithmetic
+- prune(name, path, depth) and max_depth stop a subtree before it is listed
+- yield_pruned=True still yields pruned dirs (empty), i.e. for '▶...' markers
+- jobs > 1 lists sibling subtrees ahead on a thread pool, the output order does not change
+- cache=ListingCache(top) reuses listings of directories whose mtime did not change,
+  one stat replaces the scandir (entries added, removed or renamed change the mtime),
+  listings cached within racy_ns of their dir mtime are re-listed (git's racily clean rule)
+Order and symlink handling follow os.walk(topdown=True): pre-order, scandir order,
+symlinked directories are listed but not entered. Unreadable directories are skipped.
+"""
+
+import hashlib, json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from protopy.helpers.workers import normalize_jobs
+import protopy.settings as sts
+
+# a dir changed again in the same mtime tick looks unchanged, such listings are not trusted
+racy_ns = 2_000_000_000
+
+
+class WalkDir:
+    """
+    One walked directory. dirs and files are os.DirEntry lists, removing entries
+    from dirs prunes them like dirs[:] = [...] does for os.walk.
+    """
+
+    __slots__ = ("path", "name", "rel", "depth", "dirs", "files", "pruned")
+
+    def __init__(self, path: str, name: str, rel: str, depth: int, dirs: list, files: list,
+                                                    pruned: bool = False, *args, **kwargs):
+        self.path, self.name, self.rel, self.depth = path, name, rel, depth
+        self.dirs, self.files, self.pruned = dirs, files, pruned
+
+    def __repr__(self) -> str:
+        return f"WalkDir({self.path!r}, depth={self.depth}, pruned={self.pruned})"
+
+
+def scan_dir(path: str, *args, **kwargs) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+    """
+    WHY: One listing split into (dirs, files), symlinks are classified by their target.
+    """
+    dirs, files = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(entry)
+    return dirs, files
+
+
+def _enters(entry: os.DirEntry) -> bool:
+    try:
+        return not entry.is_symlink()
+    except OSError:
+        return True
+
+
+class CachedEntry:
+    """
+    DirEntry stand-in for listings served from a ListingCache, name and path only.
+    """
+
+    __slots__ = ("name", "_prefix", "_link")
+
+    def __init__(self, prefix: str, name: str, link: bool = False, *args, **kwargs):
+        # prefix is the directory path with a trailing separator, path is built on demand
+        self.name, self._prefix, self._link = name, prefix, link
+
+    @property
+    def path(self) -> str:
+        return self._prefix + self.name
+
+    def is_symlink(self) -> bool:
+        return self._link
+
+    def __repr__(self) -> str:
+        return f"<CachedEntry {self.name!r}>"
+
+
+class ListingCache:
+    """
+    WHY: Per walked tree cache of directory listings, stored in sts.resources_dir.
+    A listing is reused while its directory keeps its mtime and was cached more than
+    racy_ns after that mtime, directories not walked in this run are dropped on save.
+    Entries are [mtime_ns, dirs, files, cached_ns].
+    """
+
+    def __init__(self, top: str, *args, **kwargs):
+        self.top = os.path.abspath(top)
+        key = hashlib.md5(self.top.encode("utf-8")).hexdigest()[:12]
+        self.path = os.path.join(
+            sts.resources_dir, "tree_cache",
+            f"{os.path.basename(self.top) or 'root'}-{key}.json",
+        )
+        self.entries: Dict[str, List] = self._load()
+        self.seen: set = set()
+        self.dirty = False
+        self.hits = self.misses = 0
+
+    def _load(self, *args, **kwargs) -> Dict[str, List]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def scan(self, path: str, rel: str, *args, **kwargs) -> Tuple[list, list]:
+        """
+        WHY: scan_dir(path) unless the cached listing of rel is still current.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        self.seen.add(rel)
+        hit = self.entries.get(rel)
+        if hit and len(hit) == 4 and hit[0] == mtime and hit[3] - mtime >= racy_ns:
+            self.hits += 1
+            prefix = path if path.endswith(os.sep) else path + os.sep
+            return ([CachedEntry(prefix, n, link) for n, link in hit[1]],
+                    [CachedEntry(prefix, n) for n in hit[2]])
+        self.misses += 1
+        cached = time.time_ns()
+        dirs, files = scan_dir(path)
+        self.entries[rel] = [mtime, [[e.name, not _enters(e)] for e in dirs],
+                                    [e.name for e in files], cached]
+        self.dirty = True
+        return dirs, files
+
+    def save(self, *args, **kwargs) -> None:
+        stale = self.entries.keys() - self.seen
+        for rel in stale:
+            del self.entries[rel]
+        if not (self.dirty or stale):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # one tmp file per thread, concurrent saves of the same tree do not collide
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def walk(top: str, *args, max_depth: int = None, prune: Callable = None,
+    yield_pruned: bool = False, jobs: int = None, cache: ListingCache = None,
+    **kwargs) -> Iterator[WalkDir]:
+    """
+    WHY: Walk top (depth 0) and yield a WalkDir per directory.
+    Directories at depth >= max_depth or for which prune(name, path, depth) is True
+    are not listed. The caller may shrink WalkDir.dirs before the walk goes on.
+    With a cache, entries of unchanged directories are CachedEntry objects and the
+    caller saves the cache once the walk is done.
+    """
+    jobs = normalize_jobs(jobs)
+    ex = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def is_pruned(name: str, path: str, depth: int) -> bool:
+        return ((max_depth is not None and depth >= max_depth)
+                or (prune is not None and prune(name, path, depth)))
+
+    def scan(path: str, rel: str):
+        return cache.scan(path, rel) if cache is not None else scan_dir(path)
+
+    def listing(path: str, rel: str, pruned: bool):
+        # thread mode: the listing already runs while earlier siblings are consumed
+        return ex.submit(scan, path, rel) if ex is not None and not pruned else None
+
+    name = os.path.basename(top)
+    pruned = is_pruned(name, top, 0)
+    stack = [(top, name, "", 0, pruned, listing(top, "", pruned))]
+    try:
+        while stack:
+            path, name, rel, depth, pruned, job = stack.pop()
+            if pruned:
+                if yield_pruned:
+                    yield WalkDir(path, name, rel, depth, [], [], True)
+                continue
+            try:
+                dirs, files = job.result() if job is not None else scan(path, rel)
+            except OSError:
+                continue
+            d = WalkDir(path, name, rel, depth, dirs, files)
+            yield d
+            children = []
+            for e in d.dirs:
+                if _enters(e):
+                    p, r = is_pruned(e.name, e.path, depth + 1), os.path.join(rel, e.name)
+                    children.append((e.path, e.name, r, depth + 1, p, listing(e.path, r, p)))
+            stack.extend(reversed(children))
+    finally:
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+
+def find_file(top: str, file_name: str, *args, **kwargs) -> str | None:
+    """
+    WHY: First path of file_name below top (pre-order), walk options as in walk().
+    """
+    for d in walk(top, *args, **kwargs):
+        for e in d.files:
+            if e.name == file_name:
+                return e.path
+    return None
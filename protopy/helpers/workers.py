@@ -0,0 +1,87 @@
+# workers.py
+"""
+WHY: Bounded worker pools for per-file work (copy, transform, remove).
+- jobs <= 1 runs inline, so the default behaviour stays sequential
+- pool='thread' suits I/O bound work, pool='process' CPU heavy transforms
+- results and errors come back in input order for deterministic reports
+- iter_jobs consumes lazy iterables (i.e. a directory walk) while workers already run
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+pools = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+def normalize_jobs(jobs: int | None = None, *args, **kwargs) -> int:
+    """
+    WHY: None/1 means sequential, 0 or negative means one worker per cpu.
+    """
+    if jobs is None:
+        return 1
+    jobs = int(jobs)
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def _call(func: Callable, item: Any, *args, **kwargs) -> Tuple[Any, Exception | None]:
+    try:
+        return func(item, *args, **kwargs), None
+    except Exception as e:
+        return None, e
+
+
+def _call_item(func: Callable, args: tuple, kwargs: dict, item: Any):
+    # item last, so partial() can bind the rest for executor.map
+    return _call(func, item, *args, **kwargs)
+
+
+def run_jobs(func: Callable, items: Iterable[Any], *args, jobs: int | None = None,
+    pool: str = "thread", **kwargs) -> List[Tuple[Any, Any, Exception | None]]:
+    """
+    WHY: Run func(item, *args, **kwargs) for every item on a bounded pool.
+    Exceptions are captured per item instead of aborting the whole run.
+
+    Returns:
+        list: [(item, result, error), ...] in the order of items
+    """
+    items = list(items)
+    jobs = min(normalize_jobs(jobs), len(items))
+    if jobs <= 1:
+        outs = [_call(func, item, *args, **kwargs) for item in items]
+    else:
+        with pools[pool](max_workers=jobs) as ex:
+            # map keeps input order; chunks reduce process pool overhead
+            chunksize = 1 if pool == "thread" else max(1, len(items) // (jobs * 4))
+            outs = list(ex.map(partial(_call_item, func, args, kwargs), items,
+                               chunksize=chunksize))
+    return [(item, res, err) for item, (res, err) in zip(items, outs)]
+
+
+def iter_jobs(func: Callable, items: Iterable[Any], *args, jobs: int | None = None,
+    pool: str = "thread", window: int = 4, **kwargs) -> Iterator[Tuple[Any, Any, Exception | None]]:
+    """
+    WHY: Streaming run_jobs. Items are pulled lazily and at most jobs * window are
+    in flight, so producing items (walking a tree) overlaps with processing them.
+
+    Yields:
+        tuple: (item, result, error) in the order of items
+    """
+    items = iter(items)
+    jobs = normalize_jobs(jobs)
+    if jobs <= 1:
+        for item in items:
+            yield (item, *_call(func, item, *args, **kwargs))
+        return
+    with pools[pool](max_workers=jobs) as ex:
+        pending = deque()
+        for item in items:
+            pending.append((item, ex.submit(_call, func, item, *args, **kwargs)))
+            if len(pending) >= jobs * window:
+                item, fut = pending.popleft()
+                yield (item, *fut.result())
+        while pending:
+            item, fut = pending.popleft()
+            yield (item, *fut.result())
@@ -65,6 +65,12 @@ ignore_files = {
         '.tiff',
     },
 }
+# file content dumps (proto info -v): files above tree_file_limit bytes show their first
+# and last tree_file_lines lines only, binary files their size,
+# all dumped contents together stop at tree_content_budget chars
+tree_file_limit = 256 << 10
+tree_file_lines = 100
+tree_content_budget = 8 << 20
 
 resources_dir = os.path.expanduser(f'~{os.sep}.{package_name}')
 if not os.path.exists(resources_dir):
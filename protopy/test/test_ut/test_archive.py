@@ -0,0 +1,193 @@
+# test_archive.py
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from contextlib import redirect_stdout
+from datetime import datetime as dt, timedelta
+from unittest import mock
+
+from protopy.creator import archive, checksums, compress, scheduler
+from protopy.helpers.throttle import TokenBucket
+
+
+class Test_Archive(unittest.TestCase):
+
+    def test_walk_source(self):
+        ignore_dirs = archive.get_parameter()["ignore_dirs"]
+        with tempfile.TemporaryDirectory() as tmp:
+            src, tgt = os.path.join(tmp, "src"), os.path.join(tmp, "tgt")
+            for parts in (("a.py",), ("pkg", "b.py"), (".git", "HEAD"),
+                          ("pkg", "__pycache__", "b.pyc"), ("empty", "sub", "c.txt")):
+                os.makedirs(os.path.join(src, *parts[:-1]), exist_ok=True)
+                open(os.path.join(src, *parts), "w").close()
+            pairs = list(archive.walk_source(src, tgt, ignore_dirs))
+            rels = sorted(os.path.relpath(s, src) for s, _ in pairs)
+            self.assertEqual(rels, ["a.py", os.path.join("empty", "sub", "c.txt"),
+                                    os.path.join("pkg", "b.py")])
+            for s, d in pairs:
+                self.assertEqual(os.path.relpath(d, tgt), os.path.relpath(s, src))
+                self.assertTrue(os.path.isdir(os.path.dirname(d)))
+            self.assertFalse(os.path.exists(os.path.join(tgt, ".git")))
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, arch = os.path.join(tmp, "src"), os.path.join(tmp, "archive")
+            os.makedirs(os.path.join(src, "pkg"))
+            for name in ("a.py", "b.py"):
+                with open(os.path.join(src, "pkg", name), "w") as f:
+                    f.write(name)
+            first = os.path.join(arch, "2026-01-01-10-00-00-000000_first")
+            archive.archive([(src, os.path.join(first, "src"))], [], checksums=True)
+            with open(os.path.join(src, "pkg", "b.py"), "w") as f:
+                f.write("changed")
+            second = os.path.join(arch, "2026-01-02-10-00-00-000000_second")
+            self.assertEqual(archive.find_link_dest(second), first)
+            archive.archive([(src, os.path.join(second, "src"))], [], link_dest=first,
+                                                                            checksums=True)
+            a1, a2, b1, b2 = (os.stat(os.path.join(d, "src", "pkg", n))
+                                for n in ("a.py", "b.py") for d in (first, second))
+            self.assertEqual(a1.st_ino, a2.st_ino)
+            self.assertNotEqual(b1.st_ino, b2.st_ino)
+            with open(os.path.join(second, "src", "pkg", "b.py")) as f:
+                self.assertEqual(f.read(), "changed")
+            self.assertEqual(len(checksums.verify(second)["ok"]), 2)
+            # damage the snapshot: one corrupt, one missing, one extra file
+            with open(os.path.join(second, "src", "pkg", "b.py"), "w") as f:
+                f.write("CHANGED")
+            os.remove(os.path.join(second, "src", "pkg", "a.py"))
+            open(os.path.join(second, "src", "new.py"), "w").close()
+            out = checksums.verify(second)
+            self.assertEqual((out["corrupt"], out["missing"], out["extra"]),
+                             (["src/pkg/b.py"], ["src/pkg/a.py"], ["src/new.py"]))
+
+    def test_archive_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            os.makedirs(os.path.join(src, "pkg"))
+            data = {os.path.join("pkg", f"m{i}.py"): os.urandom(3000) for i in range(20)}
+            for rel, content in data.items():
+                with open(os.path.join(src, rel), "wb") as f:
+                    f.write(content)
+            # small blocks, so the parallel writer produces many gzip/xz members
+            size, compress.block_size = compress.block_size, 4096
+            try:
+                for fmt in compress.formats:
+                    out = os.path.join(tmp, f"snap{compress.formats[fmt]}")
+                    archive.archive_to_file([(src, os.path.join(tmp, "snap", "src"))], [],
+                                            fmt=fmt, jobs=4, out_path=out, checksums=True)
+                    self.assertEqual(len(checksums.verify(out)["ok"]), len(data))
+                    if fmt == "zip":
+                        with zipfile.ZipFile(out) as zf:
+                            read = {n: zf.read(n) for n in zf.namelist()}
+                    else:
+                        with tarfile.open(out) as tf:
+                            read = {m.name: tf.extractfile(m).read() for m in tf.getmembers()}
+                    self.assertEqual(read, {f"src/{rel}".replace(os.sep, "/"): c
+                                                                for rel, c in data.items()})
+            finally:
+                compress.block_size = size
+            # a failing run leaves no <out>.part behind
+            def broken():
+                yield os.path.join(src, "pkg", "m0.py"), "m0.py"
+                raise RuntimeError("walk failed")
+            out = os.path.join(tmp, "broken.tar.gz")
+            with self.assertRaises(RuntimeError):
+                compress.write_archive(broken(), out, "tar.gz")
+            self.assertFalse(os.path.exists(f"{out}.part"))
+            # unreadable files are skipped, a file that shrinks mid-read aborts the archive
+            members = [(os.path.join(src, "pkg", "m0.py"), "m0.py"),
+                       (os.path.join(src, "missing.py"), "missing.py")]
+            count, errors, _ = compress.write_archive(members, out, "tar.gz", jobs=2)
+            self.assertEqual((count, [p for p, _ in errors]), (1, [members[1][0]]))
+            gettarinfo = tarfile.TarFile.gettarinfo
+            def grown(tar, *args, **kwargs):
+                info = gettarinfo(tar, *args, **kwargs)
+                info.size += 100
+                return info
+            with mock.patch.object(tarfile.TarFile, "gettarinfo", grown), \
+                 self.assertRaises(OSError):
+                compress.write_archive(members[:1], out, "tar.gz", jobs=2)
+            self.assertFalse(os.path.exists(f"{out}.part"))
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            os.makedirs(src)
+            for name in ("a.py", "b.py", "c.py"):
+                with open(os.path.join(src, name), "w") as f:
+                    f.write(name)
+            snap = os.path.join(tmp, "archive", "2026-01-01-10-00-00-000000_run")
+            archive.archive([(src, os.path.join(snap, "src"))], [])
+            # simulate a run interrupted after a.py: journal without completion, c.py lost
+            journal = os.path.join(snap, archive.journal_name)
+            with open(journal) as f:
+                lines = [l for l in f if '"rel": "src/c.py"' not in l and "complete" not in l]
+            with open(journal, "w") as f:
+                f.writelines(lines)
+            os.remove(os.path.join(snap, "src", "c.py"))
+            with open(os.path.join(src, "b.py"), "w") as f:
+                f.write("changed")
+            self.assertEqual(archive.find_resumable(os.path.dirname(snap)), snap)
+            a_ino = os.stat(os.path.join(snap, "src", "a.py")).st_ino
+            archive.archive([(src, os.path.join(snap, "src"))], [], resume=True)
+            self.assertEqual(os.stat(os.path.join(snap, "src", "a.py")).st_ino, a_ino)
+            for name, content in (("b.py", "changed"), ("c.py", "c.py")):
+                with open(os.path.join(snap, "src", name)) as f:
+                    self.assertEqual(f.read(), content)
+            self.assertIsNone(archive.find_resumable(os.path.dirname(snap)))
+            # direct copies and other non snapshot targets get no journal
+            for name, direct in (("plain", False), ("2026-01-01-10-00-00-000000_d", True)):
+                tgt = os.path.join(tmp, "direct", name)
+                archive.archive([(src, os.path.join(tgt, "src"))], [], direct=direct)
+                self.assertFalse(os.path.exists(os.path.join(tgt, archive.journal_name)))
+
+    def test_failed_round(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, archive_dir = os.path.join(tmp, "src"), os.path.join(tmp, "archive")
+            os.makedirs(src)
+            os.makedirs(archive_dir)
+            for name in ("a.py", "b.py"):
+                with open(os.path.join(src, name), "w") as f:
+                    f.write(name)
+            copy_file = archive.copy_file
+            def failing(src_path, *args, **kwargs):
+                if src_path.endswith("b.py"):
+                    raise OSError("disk error")
+                return copy_file(src_path, *args, **kwargs)
+            kwargs = dict(archive_dir=archive_dir, retention={}, target=[tmp], sources=[src])
+            with redirect_stdout(io.StringIO()):
+                with mock.patch.object(archive, "copy_file", failing):
+                    scheduler.run_once(**kwargs)
+                first = scheduler.list_snapshots(archive_dir)[0][1]
+                # the failed round is finished, the next round takes a new snapshot
+                self.assertEqual(archive.load_journal(first)[1], True)
+                self.assertIsNone(archive.find_resumable(archive_dir))
+                pruned = scheduler.run_once(**kwargs)
+            snaps = scheduler.list_snapshots(archive_dir)
+            self.assertEqual(len(snaps), 1)
+            self.assertNotEqual(snaps[0][1], first)
+            self.assertEqual([p for p, _, _ in pruned], [first])
+            self.assertTrue(os.path.isfile(os.path.join(snaps[0][1], "src", "b.py")))
+
+    def test_retention(self):
+        now = dt(2026, 3, 2, 12, 30)
+        snaps = [(now - timedelta(minutes=30 * i), f"s{i}") for i in range(24 * 2 * 10)]
+        kept = {p for _, p in snaps} - set(
+            scheduler.select_prunable(snaps, {"hourly": 3, "daily": 2, "weekly": 2}))
+        # snapshots every 30 min from Monday 12:30: hours 12, 11, 10 and Sunday 23:30,
+        # which is also the newest of the previous ISO week
+        self.assertEqual(kept, {"s0", "s2", "s4", "s26"})
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(10_000)
+        self.assertEqual(bucket.consume(10_000), 0.0)
+        self.assertAlmostEqual(bucket.consume(1_000), 0.1, delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
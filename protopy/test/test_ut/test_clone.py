@@ -0,0 +1,174 @@
+# test_clone.py
+
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from protopy.creator import bundle, clone
+from protopy.creator.bundle import file_digest
+from protopy.helpers.replacer import Replacer
+from protopy.helpers.workers import run_jobs
+import protopy.settings as sts
+
+
+class Test_CloneEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.verbose = 0
+        cls.file_rules = {"protolib": "mylib", "protopy": "mypkg", "proto": "myp"}
+        cls.text_repls = clone.manage_replacements(
+            clone.project_params,
+            {"pr_name": "mylib", "pg_name": "mypkg", "alias": "myp", "port": "9006"},
+        )
+
+    def test_rename_path(self):
+        self.assertEqual(
+            clone.rename_path(os.path.join("protopy", "protopy.py"), self.file_rules),
+            os.path.join("mypkg", "mypkg.py"),
+        )
+        # directories only rename on exact matches
+        self.assertEqual(
+            clone.rename_path(os.path.join("protopyx", "a.txt"), self.file_rules),
+            os.path.join("protopyx", "a.txt"),
+        )
+
+    def test_resource_target(self):
+        res = os.path.join("protopy", "resources")
+        self.assertEqual(clone.resource_target(os.path.join(res, "Readme.md")), "Readme.md")
+        self.assertEqual(
+            clone.resource_target(os.path.join(res, "settings.py")),
+            os.path.join("protopy", "settings.py"),
+        )
+        self.assertIsNone(clone.resource_target(os.path.join(res, "other.py")))
+
+    @staticmethod
+    def _mk_template(tmp):
+        src = os.path.join(tmp, "protolib")
+        os.makedirs(os.path.join(src, "protopy", "resources"))
+        os.makedirs(os.path.join(src, "__pycache__"))
+        files = {
+            ("protopy", "protopy.py"): b"import protopy.settings\n",
+            ("protopy", "settings.py"): b"template = 1\n",
+            ("protopy", "resources", "settings.py"): b"clone = 'protopy'\n",
+            ("protopy", "blob.dat"): b"\x89\x00protopy\xff",
+            ("run.log",): b"ignored\n",
+            ("__pycache__", "x.pyc"): b"ignored\n",
+        }
+        for parts, content in files.items():
+            with open(os.path.join(src, *parts), "wb") as f:
+                f.write(content)
+        return src
+
+    def test_clone_template(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, tgt = self._mk_template(tmp), os.path.join(tmp, "out", "mylib")
+            # bundles and the content index go to the temp dir, not ~/.protopy
+            with mock.patch.object(sts, "resources_dir", os.path.join(tmp, "resources")):
+                stats = clone.clone_template(
+                    src, tgt, file_rules=self.file_rules, text_repls=self.text_repls
+                )
+                self.assertTrue(os.listdir(os.path.join(tmp, "resources", "bundles")))
+            self.assertEqual((stats["files"], stats["binary"]), (3, 1))
+            self.assertEqual(sorted(os.listdir(tgt)), ["mypkg"])
+            with open(os.path.join(tgt, "mypkg", "settings.py")) as f:
+                self.assertEqual(f.read(), "clone = 'mypkg'\n")
+            with open(os.path.join(tgt, "mypkg", "mypkg.py")) as f:
+                self.assertEqual(f.read(), "import mypkg.settings\n")
+            # binary content is copied untouched
+            with open(os.path.join(tgt, "mypkg", "blob.dat"), "rb") as f:
+                self.assertEqual(f.read(), b"\x89\x00protopy\xff")
+            # digests recorded for proto sync match the written files
+            for rel, d in stats["digests"].items():
+                self.assertEqual(file_digest(os.path.join(tgt, rel)), d)
+
+    def test_build_bundle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = self._mk_template(tmp)
+            with mock.patch.object(sts, "resources_dir", os.path.join(tmp, "resources")):
+                targets, tokens, marker = clone.collect_template(src), ["protopy"], "# x"
+                _, stats = bundle.fingerprint(src, targets, tokens=tokens, marker=marker)
+                root = bundle.bundles_dir()
+                os.makedirs(root)
+                new = os.path.join(root, "protolib-x-new")
+                # concurrent builds of the same bundle all succeed, no tmp dir is left
+                build = lambda _: bundle.build_bundle(src, targets, new, stats=stats,
+                                                            tokens=tokens, marker=marker)
+                out = run_jobs(build, range(4), jobs=4)
+                self.assertEqual([(r, e) for _, r, e in out], [(new, None)] * 4)
+                self.assertEqual(os.listdir(root), ["protolib-x-new"])
+                # outdated bundles are pruned unless another clone used them recently
+                for name, age in (("used", 0), ("old", 2 * bundle.prune_grace_s)):
+                    shutil.copytree(new, os.path.join(root, f"protolib-x-{name}"))
+                    t = time.time() - age
+                    os.utime(os.path.join(root, f"protolib-x-{name}", "manifest.json"), (t, t))
+                bundle.prune_bundles("protolib-x-", "protolib-x-new")
+                self.assertEqual(sorted(os.listdir(root)), ["protolib-x-new", "protolib-x-used"])
+
+    def test_plan_clone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, tgt = self._mk_template(tmp), os.path.join(tmp, "out", "mylib")
+            resources = os.path.join(tmp, "resources")
+            with mock.patch.object(sts, "resources_dir", resources):
+                planned, bundle = clone.plan_clone(src, tgt, file_rules=self.file_rules,
+                                                                            dry_run=True)
+                # a dry run neither builds a bundle nor touches the target
+                self.assertIsNone(bundle)
+                self.assertFalse(os.path.exists(resources))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    clone.clone_template(src, tgt, file_rules=self.file_rules,
+                                        text_repls=self.text_repls, dry_run=True)
+                self.assertFalse(os.path.exists(tgt))
+                plan, bundle = clone.plan_clone(src, tgt, file_rules=self.file_rules)
+                ops = lambda p: [(o.op, o.path, o.src, o.size) for o in p.ops]
+                self.assertEqual(ops(planned), ops(plan))
+                self.assertEqual([(o.op, o.path) for o in plan.of("copy")],
+                                 [("copy", os.path.join("mypkg", "blob.dat"))])
+                self.assertEqual(plan.leaf_dirs(), [os.path.join(tgt, "mypkg")])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    clone.clone_template(src, tgt, file_rules=self.file_rules,
+                                        text_repls=self.text_repls, bundle=bundle)
+            # applying the plan writes exactly the planned files
+            written = sorted(os.path.relpath(os.path.join(r, f), tgt)
+                             for r, _, fs in os.walk(tgt) for f in fs)
+            self.assertEqual(written, sorted(o.path for o in plan.ops if o.op in ("write", "copy")))
+
+    def test_collect_template(self):
+        # /creator is not cloned, neither are the tests that import it
+        for rel, src_path in clone.collect_template(sts.project_dir).items():
+            self.assertFalse(rel.startswith(os.path.join("protopy", "creator")), rel)
+            if rel.endswith(".py") and os.sep + "test" + os.sep in rel:
+                with open(src_path, encoding="utf-8") as f:
+                    self.assertNotIn("protopy.creator", f.read(), rel)
+
+    def test_cloned_server(self):
+        # the alias replacement must not rename the server's protocol_version
+        with open(os.path.join(sts.apis_dir, "server.pyw"), encoding="utf-8") as f:
+            text = Replacer(self.text_repls).sub(f.read())
+        m = re.search(r'setattr\((\w+), (.+), "HTTP/1.1"\)', text)
+        self.assertEqual(m.group(1), "MypControlHandler")
+        self.assertEqual(eval(m.group(2)), "protocol_version")
+
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "projects.yml")
+            with open(path, "w") as f:
+                f.write(
+                    "defaults: {tgt_dir: /tmp, port: 9101}\n"
+                    "projects:\n"
+                    "  - {new_pr_name: alib, new_pg_name: apkg}\n"
+                    "  - {new_pr_name: same, new_pg_name: same, port: 9102}\n"
+                )
+            entries = clone.load_manifest(path)
+        self.assertEqual([e["port"] for e in entries], [9101, 9102])
+        self.assertIsNone(clone.check_manifest_entry(entries[0], available=set()))
+        self.assertIsNotNone(clone.check_manifest_entry(entries[1], available=set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# test_copying.py
+
+import errno
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from protopy.helpers import copying
+
+
+class Test_Copying(unittest.TestCase):
+
+    def test_copy_modes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src.bin")
+            with open(src, "wb") as f:
+                f.write(os.urandom(300_000))
+            os.utime(src, ns=(1_600_000_000_000_000_000,) * 2)
+            for mode in copying.copy_modes:
+                dst = os.path.join(tmp, f"{mode}.bin")
+                used = copying.copy_file(src, dst, mode=mode)
+                self.assertIn(used, copying.backends)
+                with open(src, "rb") as a, open(dst, "rb") as b:
+                    self.assertEqual(a.read(), b.read())
+                self.assertEqual(os.stat(dst).st_mtime_ns, os.stat(src).st_mtime_ns)
+            # a copy over an existing hardlink must not change the source
+            dst = os.path.join(tmp, "hardlink.bin")
+            other = os.path.join(tmp, "other.bin")
+            with open(other, "wb") as f:
+                f.write(b"other")
+            copying.copy_file(other, dst, mode="kernel")
+            self.assertEqual(os.path.getsize(src), 300_000)
+
+    def test_unsupported_kernel_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, dst = os.path.join(tmp, "src.txt"), os.path.join(tmp, "dst.txt")
+            with open(src, "w") as f:
+                f.write("data")
+            # no copy_file_range and no sendfile into files (i.e. macOS)
+            with mock.patch.object(copying.os, "copy_file_range", None, create=True), \
+                 mock.patch.object(copying, "_sendfile", None), \
+                 mock.patch.dict(copying._auto, clear=True):
+                self.assertEqual(copying.copy_file(src, dst, mode="kernel"), "copy2")
+                self.assertIn(copying.copy_file(src, dst), ("reflink", "copy2"))
+            with open(dst) as f:
+                self.assertEqual(f.read(), "data")
+            # a kernel copy that stops early is redone, never kept short
+            with mock.patch.object(copying.os, "copy_file_range", return_value=0, create=True):
+                self.assertEqual(copying.copy_file(src, dst, mode="kernel"), "kernel")
+            with open(dst) as f:
+                self.assertEqual(f.read(), "data")
+            # real errors are raised, not retried with the next backend
+            denied = mock.Mock(side_effect=PermissionError(errno.EPERM, "denied"))
+            with mock.patch.dict(copying.backends, {"kernel": denied}):
+                self.assertRaises(PermissionError, copying.copy_file, src, dst, mode="kernel")
+
+
+if __name__ == "__main__":
+    unittest.main()
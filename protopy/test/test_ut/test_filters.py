@@ -0,0 +1,28 @@
+# test_filters.py
+
+import os
+import unittest
+
+from protopy.helpers.filters import filters
+
+
+class Test_Filters(unittest.TestCase):
+    def test_match(self):
+        flt = filters(0, ignore_dirs={".git", "*.egg-info", "*helpers", "b?ild"},
+                        abrev_dirs={"logs"}, ignore_files={5: {"LICENSE"}, 99: {".png"}},
+                        archive_dirs=["/__pycache__", r"/\.tox"])
+        self.assertTrue(flt.match(os.path.join("prj", "protopy.egg-info"), "dir"))
+        self.assertTrue(flt.match("myhelpers", "dir"))
+        self.assertTrue(flt.match("build", "dir"))
+        self.assertFalse(flt.match("git", "dir"))
+        self.assertTrue(flt.match(os.path.join("prj", "logs"), "abbrev"))
+        self.assertTrue(flt.match("Logo.PNG", "file"))
+        self.assertTrue(flt.match(os.path.join("prj", "pkg", "__pycache__"), "archive"))
+        self.assertFalse(flt.match(os.path.join("prj", "pkg"), "archive"))
+        # file patterns are only hidden below their verbosity level
+        self.assertFalse(filters(5, ignore_files={5: {"LICENSE"}}).match("LICENSE", "file"))
+        self.assertIs(filters(0), filters(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
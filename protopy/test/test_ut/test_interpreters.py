@@ -0,0 +1,44 @@
+# test_interpreters.py
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from protopy.creator import interpreters
+
+
+class Test_Interpreters(unittest.TestCase):
+
+    def test_from_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("python3.12", "python.exe", "python3-config", "pythonw"):
+                open(os.path.join(tmp, name), "w").close()
+            with mock.patch.dict(os.environ, {"PATH": os.pathsep.join([tmp, "/nonexistent"])}):
+                found = {os.path.basename(p) for p in interpreters._from_path()}
+        self.assertEqual(found, {"python3.12", "python.exe"})
+
+    def test_interpreter_versions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            exes = [os.path.join(tmp, name) for name in ("python3.11", "python3.12")]
+            for exe in exes:
+                with open(exe, "w") as f:
+                    f.write(exe)
+            version = lambda *args, exe, **kwargs: "3." + exe[-2:] + ".1"
+            with mock.patch.object(interpreters.sts, "resources_dir", tmp), \
+                 mock.patch.object(interpreters, "find_interpreters", return_value=set(exes)), \
+                 mock.patch.object(interpreters, "_version_of", side_effect=version) as probe:
+                found = interpreters.interpreter_versions()
+                self.assertEqual(interpreters.interpreter_versions(), found)
+                # the second call is served from the cache in resources_dir
+                self.assertEqual(probe.call_count, 2)
+                self.assertTrue(os.path.isfile(os.path.join(tmp, "interpreters.json")))
+                with open(exes[0], "a") as f:
+                    f.write("updated")
+                interpreters.interpreter_versions()
+                self.assertEqual(probe.call_count, 3)
+        self.assertEqual(found, {exes[0]: "3.11.1", exes[1]: "3.12.1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_profiler.py
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from protopy.creator.clone import report_profile
+from protopy.creator.profiler import Profiler
+
+
+class Test_Profiler(unittest.TestCase):
+    def test_phases(self):
+        p = Profiler("clone")
+        for _ in range(2):
+            with p.phase("copy") as rec:
+                time.sleep(0.01)
+        p.add("copy", files=2, read=10, written=20)
+        p.add("copy", files=1, written=5)
+        with p.phase("install"):
+            pass
+        copy = p.phases["copy"]
+        # repeated phases accumulate their time and calls
+        self.assertIs(rec, copy)
+        self.assertEqual(copy["calls"], 2)
+        self.assertGreaterEqual(copy["wall_s"], 0.02)
+        self.assertEqual((copy["files"], copy["read"], copy["written"]), (3, 10, 25))
+        total = p.report()["total"]
+        self.assertEqual((total["files"], total["written"]), (3, 25))
+        self.assertIn("total", p.table())
+
+    def test_report_profile(self):
+        p = Profiler("clone")
+        p.add("render", files=1, read=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = os.path.join(tmp, "mylib")
+            with contextlib.redirect_stdout(io.StringIO()):
+                path = report_profile(prj, profiler=p, new_pr_name="mylib", jobs=4)
+            self.assertEqual(path, f"{prj}_clone_profile.json")
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertEqual(sorted(report), ["name", "params", "phases", "project_path", "started",
+                                                                                    "total"])
+        self.assertEqual((report["params"]["new_pr_name"], report["params"]["jobs"]), ("mylib", 4))
+        self.assertEqual(report["phases"]["render"]["read"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
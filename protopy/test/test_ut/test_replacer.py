@@ -0,0 +1,30 @@
+# test_replacer.py
+
+import unittest
+
+from protopy.helpers.replacer import Replacer, compile_replacer
+
+
+class Test_Replacer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.verbose = 0
+        cls.text_repls = {"protolib": "mylib", "protopy": "protobuf", "proto": "myp"}
+
+    def test_sub(self):
+        r = Replacer(self.text_repls)
+        text = "protolib/protopy.py PROTOPY Proto proto_x"
+        # longest token wins and replaced text is not rescanned ('protobuf' stays)
+        self.assertEqual(r.sub(text), "mylib/protobuf.py PROTOBUF Myp myp_x")
+
+    def test_spans_splice(self):
+        r = compile_replacer(self.text_repls)
+        text = "import protopy\n# Protolib\n"
+        spans = r.spans(text)
+        self.assertEqual([s[2] for s in spans], ["protopy", "Protolib"])
+        self.assertEqual(r.splice(text, spans), r.sub(text))
+        self.assertIs(r, compile_replacer(dict(self.text_repls)))
+
+
+if __name__ == "__main__":
+    unittest.main()
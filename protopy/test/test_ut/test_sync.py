@@ -0,0 +1,88 @@
+# test_sync.py
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from protopy.creator import clone, sync
+from protopy.creator.bundle import file_digest
+import protopy.settings as sts
+
+
+class Test_Sync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "protolib")
+        self.prj = os.path.join(self.tmp.name, "out", "mylib")
+        os.makedirs(os.path.join(self.src, "protopy"))
+        self.write(self.src, "Pipfile", '[requires]\npython_version = "3.9"\n')
+        self.write(self.src, "protopy/settings.py", "name = 'protopy'\n")
+        self.write(self.src, "protopy/util.py", "x = 1\n")
+        self.write(self.src, "protopy/extra.py", "y = 1\n")
+        self.patches = [mock.patch.object(sts, "project_dir", self.src),
+                        mock.patch.object(sts, "resources_dir", os.path.join(self.tmp.name, "res"))]
+        for p in self.patches:
+            p.start()
+        file_rules, text_repls = clone.clone_rules("mylib", "mypkg", "myp", 9006)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = clone.clone_template(self.src, self.prj, file_rules=file_rules,
+                                                            text_repls=text_repls, quiet=True)
+            # like clone_and_install: Pipfile edit first, then the record
+            pipfile = os.path.join(self.prj, "Pipfile")
+            clone.set_python_version_in_pipfile(pipfile, py_version="3.12")
+        stats["digests"]["Pipfile"] = file_digest(pipfile)
+        clone.write_clone_record(self.prj, stats["digests"], new_pr_name="mylib",
+                        new_pg_name="mypkg", new_alias="myp", port=9006, py_version="3.12")
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(root, rel, text, mode="w"):
+        with open(os.path.join(root, *rel.split("/")), mode) as f:
+            f.write(text)
+
+    @staticmethod
+    def read(root, rel):
+        with open(os.path.join(root, *rel.split("/"))) as f:
+            return f.read()
+
+    def actions(self):
+        return sorted(sync.plan_sync(self.prj)[1])
+
+    def test_unchanged(self):
+        # the py_version edit of the Pipfile is not a local modification
+        plan, actions, _, _ = sync.plan_sync(self.prj)
+        self.assertEqual((plan.ops, actions), ([], []))
+
+    def test_sync(self):
+        self.write(self.src, "Pipfile", "[packages]\n", mode="a")
+        self.write(self.src, "protopy/util.py", "x = 'protopy'\n")
+        self.write(self.src, "protopy/settings.py", "name = 'protopy2'\n")
+        self.write(self.prj, "mypkg/settings.py", "name = 'local'\n")
+        self.write(self.prj, "mypkg/extra.py", "y = 'local'\n")
+        self.assertEqual(self.actions(), [
+            ("conflict, modified locally", os.path.join("mypkg", "settings.py")),
+            ("update", "Pipfile"),
+            ("update", os.path.join("mypkg", "util.py")),
+        ])
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = sync.sync_project(self.prj)
+        self.assertEqual((stats["written"], stats["conflicts"], stats["errors"]), (2, 1, []))
+        # upstream only changes are applied, local edits and conflicts are kept
+        self.assertEqual(self.read(self.prj, "mypkg/util.py"), "x = 'mypkg'\n")
+        self.assertEqual(self.read(self.prj, "mypkg/extra.py"), "y = 'local'\n")
+        self.assertEqual(self.read(self.prj, "mypkg/settings.py"), "name = 'local'\n")
+        self.assertEqual(self.read(self.prj, "Pipfile"),
+                         '[requires]\npython_version = "3.12"\n[packages]\n')
+        self.assertEqual(self.actions(),
+                         [("conflict, modified locally", os.path.join("mypkg", "settings.py"))])
+
+
+if __name__ == "__main__":
+    unittest.main()
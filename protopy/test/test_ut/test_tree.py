@@ -0,0 +1,116 @@
+# test_tree.py
+
+import json
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+import protopy.helpers.tree as tree_module
+from protopy.helpers.loader import ContentLoader
+from protopy.helpers.tree import Tree
+
+
+class Test_Tree(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.prj = os.path.join(cls.tmp.name, "prj")
+        files = {
+            ("pkg", "mod.py"): "import os\n",
+            ("pkg", "__pycache__", "mod.pyc"): "ignored\n",
+            ("logs", "a.log"): "a\n",
+            ("logs", "b.log"): "b\n",
+            ("Readme.md",): "# prj\n",
+        }
+        for parts, content in files.items():
+            os.makedirs(os.path.join(cls.prj, *parts[:-1]), exist_ok=True)
+            with open(os.path.join(cls.prj, *parts), "w") as f:
+                f.write(content)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_iter_tree(self):
+        tree = Tree(verbose=3, yes=True)
+        out, contents = tree.mk_tree(project_dir=self.prj, file_match_regex=r"\.py$")
+        self.assertEqual(tree.matched_files, [os.path.join(self.prj, "pkg", "mod.py")])
+        self.assertIn("▶...", out)
+        self.assertNotIn("mod.pyc", out)
+        self.assertIn("import os", contents)
+        # streamed output joins back to the rendered strings
+        self.assertEqual("\n".join(tree.iter_tree(project_dir=self.prj)), out)
+        self.assertEqual("".join(tree.iter_contents(project_dir=self.prj)), contents)
+
+    def test_iter_text(self):
+        tree = Tree(verbose=3, yes=True)
+        out, contents = tree.mk_tree(project_dir=self.prj)
+        walks = []
+        real_walk = tree_module.walk
+        def counting(*args, **kwargs):
+            walks.append(args[0])
+            return real_walk(*args, **kwargs)
+        with mock.patch.object(tree_module, "walk", counting):
+            text = "".join(tree.iter_text(project_dir=self.prj))
+        # hierarchy and contents come from a single walk
+        self.assertEqual(walks, [self.prj])
+        self.assertEqual(text, f"{out}\n{contents}")
+        self.assertEqual("".join(tree.iter_text(project_dir=self.prj, contents=False)), out)
+
+    def test_colorized(self):
+        tree = Tree(verbose=3, yes=True)
+        plain, _ = tree.mk_tree(project_dir=self.prj, colorized=False)
+        colored, _ = tree.mk_tree(project_dir=self.prj, colorized=True)
+        self.assertEqual(re.sub(r"\x1b\[[0-9;]*m", "", colored), plain.strip())
+        # styled extensions color the whole file name
+        self.assertIn(f"{tree._ext_cols['.py']}mod.py", colored)
+
+    def test_nodes(self):
+        tree = Tree(verbose=3, yes=True)
+        root = tree.mk_nodes(project_dir=self.prj)
+        self.assertFalse(root.loaded)
+        mod = root.get("pkg/mod.py")
+        self.assertEqual((mod.kind, mod.size), ("file", len("import os\n")))
+        # only the dirs on the way were listed
+        self.assertFalse(root.get("logs").loaded)
+        self.assertTrue(root.get("pkg/__pycache__").pruned)
+        self.assertEqual(tree.render_nodes(root), tree.mk_tree(project_dir=self.prj)[0])
+        data = json.loads(root.get("pkg").to_json(depth=1))
+        self.assertEqual(sorted(c["name"] for c in data["children"]), ["__pycache__", "mod.py"])
+        self.assertNotIn("children", data["children"][-1])
+        # the payload stays JSON serializable, nodes are served by apis/tree.py
+        json.dumps(tree(project_dir=self.prj))
+
+    def test_content_limits(self):
+        path = os.path.join(self.tmp.name, "big.txt")
+        with open(path, "w") as f:
+            f.write("h" * 100 + "m" * 1000 + "t" * 100)
+        loader = ContentLoader(file_limit=200, budget=150)
+        read = loader.read(path)
+        self.assertEqual(read, (b"h" * 100, b"t" * 100, 1200, False))
+        self.assertIn("[1000 B of 1.2 KiB truncated", loader.text(read))
+        # the budget cuts the first text and omits everything after it
+        self.assertIn("chars over budget", loader.load(path))
+        self.assertTrue(loader.exhausted)
+        self.assertEqual(loader.load(path), "[content budget exhausted]\n")
+        with open(path, "rb") as f:
+            self.assertEqual(loader.get(path, whole=True)[0], f.read())
+        loader.close()
+
+    def test_large_files(self):
+        log, blob = os.path.join(self.tmp.name, "big.log"), os.path.join(self.tmp.name, "blob")
+        with open(log, "w") as f:
+            f.write("".join(f"line {i}\n" for i in range(1000)))
+        with open(blob, "wb") as f:
+            f.write(b"\x00\x01" * 1000)
+        loader = ContentLoader(file_limit=1000, lines=2)
+        head, tail, size, binary = loader.read(log)
+        self.assertEqual((head, tail, binary), (b"line 0\nline 1\n", b"line 998\nline 999\n", False))
+        # the line count is estimated from the bytes that were read
+        self.assertRegex(loader.text((head, tail, size, binary)), r"~\d+ lines in total")
+        self.assertEqual(loader.text(loader.read(blob)), "[binary file, 2.0 KiB]\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# test_walker.py
+
+import os
+import tempfile
+import time
+import unittest
+
+from protopy.helpers.walker import ListingCache, find_file, walk
+
+
+class Test_Walker(unittest.TestCase):
+    def test_walk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for d in ("a/b/c", "a/skip/x", "d"):
+                os.makedirs(os.path.join(tmp, *d.split("/")))
+            for f in ("r.txt", "a/a.txt", "a/b/c/deep.txt", "a/skip/x/s.txt", "d/d.txt"):
+                with open(os.path.join(tmp, *f.split("/")), "w") as fh:
+                    fh.write(f)
+            expected = [(r, sorted(ds), sorted(fs)) for r, ds, fs in os.walk(tmp)]
+            for jobs in (None, 4):
+                got = [(d.path, sorted(e.name for e in d.dirs), sorted(e.name for e in d.files))
+                                                                    for d in walk(tmp, jobs=jobs)]
+                # same pre-order as os.walk
+                self.assertEqual(sorted(got), sorted(expected))
+                self.assertEqual([g[0] for g in got], [e[0] for e in expected])
+            walked = {d.rel: d.pruned for d in walk(tmp, max_depth=2, yield_pruned=True,
+                                            prune=lambda name, *_: name == "skip")}
+            # depth >= max_depth and pruned dirs are yielded but never listed
+            self.assertEqual(walked, {"": False, "a": False, "d": False,
+                            os.path.join("a", "b"): True, os.path.join("a", "skip"): True})
+            self.assertEqual(find_file(tmp, "deep.txt", max_depth=3), None)
+            self.assertEqual(find_file(tmp, "deep.txt"), os.path.join(tmp, "a", "b", "c", "deep.txt"))
+
+    def test_listing_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "a", "b"))
+            with open(os.path.join(tmp, "a", "x.txt"), "w") as fh:
+                fh.write("x")
+            # dirs older than racy_ns, their listings are trusted from the next run on
+            old = time.time_ns() - 60_000_000_000
+            for d in ("a", "a/b"):
+                os.utime(os.path.join(tmp, *d.split("/")), ns=(old, old))
+            cache_path = os.path.join(tmp, "cache.json")
+            listing = lambda d: (d.rel, sorted(e.name for e in d.dirs), sorted(e.name for e in d.files))
+            runs = []
+            for step in range(4):
+                lc = ListingCache(os.path.join(tmp, "a"))
+                # keep the test out of sts.resources_dir
+                lc.path = cache_path
+                lc.entries = lc._load()
+                runs.append([listing(d) for d in walk(os.path.join(tmp, "a"), cache=lc)])
+                lc.save()
+                if step == 1:
+                    self.assertEqual((lc.hits, lc.misses), (2, 0))
+                    # a new entry changes the directory mtime, only that dir is re-listed
+                    with open(os.path.join(tmp, "a", "b", "y.txt"), "w") as fh:
+                        fh.write("y")
+                if step == 2:
+                    self.assertEqual((lc.hits, lc.misses), (1, 1))
+            self.assertEqual(runs[0], runs[1])
+            self.assertEqual(runs[2][1], ("b", [], ["y.txt"]))
+            # b was listed within racy_ns of its mtime, it is listed again
+            self.assertEqual(runs[3], runs[2])
+            self.assertEqual((lc.hits, lc.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
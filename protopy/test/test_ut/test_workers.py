@@ -0,0 +1,50 @@
+# test_workers.py
+
+import time
+import unittest
+
+from protopy.helpers.workers import iter_jobs, normalize_jobs, run_jobs
+
+
+def _work(item, *args, scale: int = 1, **kwargs):
+    if item == 3:
+        raise ValueError(item)
+    # later items finish first, results must still come back in input order
+    time.sleep(0.001 * (10 - item))
+    return item * scale
+
+
+class Test_Workers(unittest.TestCase):
+    def test_normalize_jobs(self):
+        self.assertEqual(normalize_jobs(None), 1)
+        self.assertEqual(normalize_jobs("3"), 3)
+        self.assertGreaterEqual(normalize_jobs(0), 1)
+
+    def test_run_jobs(self):
+        for jobs in (None, 4):
+            out = run_jobs(_work, range(10), jobs=jobs, scale=2)
+            self.assertEqual([item for item, _, _ in out], list(range(10)))
+            self.assertEqual([res for item, res, _ in out if item != 3],
+                             [i * 2 for i in range(10) if i != 3])
+            # one failing item is reported, the others still run
+            _, res, err = out[3]
+            self.assertIsNone(res)
+            self.assertIsInstance(err, ValueError)
+
+    def test_iter_jobs(self):
+        pulled = []
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+        it = iter_jobs(_work, items(), jobs=2, window=2)
+        self.assertEqual(next(it), (0, 0, None))
+        # at most jobs * window items are pulled before the first result
+        self.assertEqual(len(pulled), 4)
+        rest = list(it)
+        self.assertEqual([item for item, _, _ in rest], list(range(1, 10)))
+        self.assertIsInstance(rest[2][2], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()